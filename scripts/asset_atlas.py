@@ -0,0 +1,210 @@
+import os
+import sys
+import json
+import math
+import hashlib
+import argparse
+
+import instrumentation
+from instrumentation import count, stage, timed
+from market_asset_downloader import OUTPUT_DIR, load_items, sanitize_filename
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Junta os ícones dos itens do mercado em poucas folhas de sprites (uma ou mais por `group`),
+# para o mercado carregar algumas imagens em vez de uma por item.
+# Uso: python asset_atlas.py [--tier md] [--max-size 2048]
+# Gera <atlas>/<grupo>-<n>.webp, <atlas>/atlas.json e src/data/itemAtlas.ts com
+# nome do arquivo (sanitize_filename) -> (folha, x, y, w, h).
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ATLAS_DIR = os.path.join(BASE_DIR, 'public', 'assets', 'atlas')
+TS_PATH = os.path.join(BASE_DIR, 'src', 'data', 'itemAtlas.ts')
+# Miniaturas de asset_postprocess.py usadas nas folhas ('' = imagem do card)
+DEFAULT_TIER = "md"
+MAX_SHEET_SIZE = 2048
+# Espaço entre ícones, para o filtro de escala do navegador não misturar vizinhos
+PADDING = 2
+SHEET_QUALITY = 90
+
+
+def pack_shelves(sizes, max_size=MAX_SHEET_SIZE, padding=PADDING):
+    """
+    Empacota retângulos [(nome, w, h)] em prateleiras (first-fit decreasing height):
+    ordena pela altura, preenche linhas da esquerda para a direita e abre uma nova folha
+    quando a atual enche. A largura da folha busca um formato próximo do quadrado.
+    Mesma entrada, mesma saída: [(largura, altura, [(nome, x, y, w, h)])] por folha.
+    """
+    if not sizes:
+        return []
+    too_big = [name for name, w, h in sizes if w > max_size or h > max_size]
+    if too_big:
+        raise ValueError(f"Ícones maiores que a folha ({max_size}px): {', '.join(too_big)}")
+
+    area = sum((w + padding) * (h + padding) for _, w, h in sizes)
+    width = min(max_size, max(max(w for _, w, _ in sizes), math.ceil(math.sqrt(area))))
+    order = sorted(sizes, key=lambda s: (-s[2], -s[1], s[0]))
+
+    sheets = []
+    placed, shelves = [], []  # shelves: [y, altura, próximo x]
+    for name, w, h in order:
+        for shelf in shelves:
+            if shelf[2] + w <= width and h <= shelf[1]:
+                break
+        else:
+            y = shelves[-1][0] + shelves[-1][1] + padding if shelves else 0
+            if y + h > max_size:
+                sheets.append(placed)
+                placed, shelves, y = [], [], 0
+            shelf = [y, h, 0]
+            shelves.append(shelf)
+        placed.append((name, shelf[2], shelf[0], w, h))
+        shelf[2] += w + padding
+    sheets.append(placed)
+    return [(max(x + w for _, x, _, w, _ in p), max(y + h for _, _, y, _, h in p), p) for p in sheets]
+
+
+def group_slug(group):
+    return sanitize_filename(group)[:-len(".webp")]
+
+
+@timed("atlas.scan")
+def collect_icons(icon_dir):
+    """{grupo: [(arquivo, caminho)]} dos itens com ícone já baixado, na ordem dos dados"""
+    groups, seen = {}, set()
+    for item in load_items():
+        filename = sanitize_filename(item['name'])
+        path = os.path.join(icon_dir, filename)
+        if filename in seen or not os.path.isfile(path):
+            continue
+        seen.add(filename)
+        groups.setdefault(item['group'], []).append((filename, path))
+    return groups
+
+
+def file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_atlas(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"sheets": {}, "icons": {}}
+
+
+def render_sheet(width, height, placements, paths, out_path):
+    sheet = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    for name, x, y, _, _ in placements:
+        with Image.open(paths[name]) as icon:
+            sheet.paste(icon.convert("RGBA"), (x, y))
+    tmp = out_path + ".tmp"
+    sheet.save(tmp, "WEBP", quality=SHEET_QUALITY, method=6)
+    os.replace(tmp, out_path)
+
+
+def write_ts(atlas, path, url_prefix):
+    """Módulo TS com as folhas (URL e tamanho) e a posição de cada ícone"""
+    sheets = {name: {"url": f"{url_prefix}/{s['file']}", "width": s["width"], "height": s["height"]}
+              for name, s in atlas["sheets"].items()}
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write("// Gerado por scripts/asset_atlas.py - não editar manualmente\n")
+        f.write("export interface AtlasSprite {\n  sheet: string;\n  x: number;\n  y: number;\n  w: number;\n  h: number;\n}\n\n")
+        f.write(f"export const ITEM_ATLAS_SHEETS = {json.dumps(sheets, ensure_ascii=False, indent=2)} as const;\n\n")
+        f.write("export const ITEM_ATLAS: Record<string, AtlasSprite> = ")
+        f.write(json.dumps(atlas["icons"], ensure_ascii=False, indent=2))
+        f.write(";\n")
+
+
+def build_atlas(icon_dir, atlas_dir=ATLAS_DIR, ts_path=TS_PATH, max_size=MAX_SHEET_SIZE, force=False):
+    """
+    Monta as folhas por grupo e grava atlas.json (e o módulo TS, se ts_path).
+    Incremental: uma folha só é redesenhada se o seu conteúdo (ícones, hashes e posições)
+    mudou desde a última execução; folhas que deixaram de existir são apagadas.
+    Devolve {"rendered": n, "skipped": n, "removed": n}.
+    """
+    os.makedirs(atlas_dir, exist_ok=True)
+    atlas_path = os.path.join(atlas_dir, "atlas.json")
+    previous = load_atlas(atlas_path)
+    stats = {"rendered": 0, "skipped": 0, "removed": 0}
+    atlas = {"sheets": {}, "icons": {}}
+
+    groups = collect_icons(icon_dir)
+    for group, icons in groups.items():
+        paths = dict(icons)
+        sizes = []
+        for filename, path in icons:
+            with Image.open(path) as img:
+                sizes.append((filename, img.width, img.height))
+        with stage("atlas.pack"):
+            packed = pack_shelves(sizes, max_size)
+
+        for n, (width, height, placements) in enumerate(packed, 1):
+            sheet = f"{group_slug(group)}-{n}"
+            members = [[name, x, y, w, h, file_sha256(paths[name])] for name, x, y, w, h in placements]
+            digest = hashlib.sha256(json.dumps([width, height, members]).encode('utf-8')).hexdigest()
+            out_path = os.path.join(atlas_dir, f"{sheet}.webp")
+
+            old = previous["sheets"].get(sheet)
+            if not force and old and old.get("hash") == digest and os.path.exists(out_path):
+                stats["skipped"] += 1
+            else:
+                with stage("atlas.render"):
+                    render_sheet(width, height, placements, paths, out_path)
+                stats["rendered"] += 1
+            atlas["sheets"][sheet] = {"file": f"{sheet}.webp", "group": group, "width": width,
+                                      "height": height, "hash": digest}
+            for name, x, y, w, h in placements:
+                atlas["icons"][name] = {"sheet": sheet, "x": x, "y": y, "w": w, "h": h}
+
+    for sheet, info in previous["sheets"].items():
+        if sheet not in atlas["sheets"]:
+            try:
+                os.remove(os.path.join(atlas_dir, info["file"]))
+                stats["removed"] += 1
+            except OSError:
+                pass
+
+    atlas["icons"] = dict(sorted(atlas["icons"].items()))
+    with open(atlas_path, 'w', encoding='utf-8') as f:
+        json.dump(atlas, f, ensure_ascii=False, indent=1)
+    if ts_path:
+        url_prefix = "/" + os.path.relpath(atlas_dir, os.path.join(BASE_DIR, 'public')).replace(os.sep, "/")
+        write_ts(atlas, ts_path, url_prefix)
+    count("atlas.icons", len(atlas["icons"]))
+    count("atlas.sheets_rendered", stats["rendered"])
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monta folhas de sprites com os ícones dos itens do mercado")
+    parser.add_argument("--icon-dir", default=OUTPUT_DIR, help="Pasta das imagens dos itens")
+    parser.add_argument("--tier", default=DEFAULT_TIER,
+                        help="Subpasta de miniaturas usada (md, sm; '' = imagem do card)")
+    parser.add_argument("--atlas-dir", default=ATLAS_DIR)
+    parser.add_argument("--ts-output", default=TS_PATH, help="Módulo TS gerado ('' = não gerar)")
+    parser.add_argument("--max-size", type=int, default=MAX_SHEET_SIZE, help="Lado máximo de cada folha (px)")
+    parser.add_argument("--force", action="store_true", help="Redesenha todas as folhas")
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.start(args.profile)
+
+    if Image is None:
+        print("ERRO: Pillow não instalado (pip install pillow)", file=sys.stderr)
+        sys.exit(2)
+    icon_dir = os.path.join(args.icon_dir, args.tier) if args.tier else args.icon_dir
+    if not os.path.isdir(icon_dir):
+        print(f"ERRO: {icon_dir} não encontrado (rode asset_postprocess.py para gerar as miniaturas)", file=sys.stderr)
+        sys.exit(2)
+    try:
+        stats = build_atlas(icon_dir, args.atlas_dir, args.ts_output or None, args.max_size, args.force)
+    except ValueError as e:
+        print(f"ERRO: {e}", file=sys.stderr)
+        sys.exit(2)
+    print(f"Atlas: {stats['rendered']} folhas geradas, {stats['skipped']} sem mudanças, "
+          f"{stats['removed']} removidas -> {args.atlas_dir}")
@@ -0,0 +1,217 @@
+import io
+import os
+import sys
+import argparse
+import importlib
+import hashlib
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+import instrumentation
+from asset_store import PART_SUFFIX, AssetManifest
+from instrumentation import count, stage
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# Pós-processamento das imagens baixadas pelo market_asset_downloader.py:
+# decodifica, recorta/redimensiona para o tamanho do card do mercado, remove o fundo
+# (opcional) e grava WebP de verdade, mais miniaturas em subpastas por tamanho.
+# O arquivo baixado fica em .cache/market_originals/ e todo reprocessamento parte dele.
+# Uso: python asset_postprocess.py [--process-workers N] [--quality 80] [--background rembg]
+
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'public', 'assets', 'items')
+# Lado (px) da imagem do card; as miniaturas ficam em <pasta>/<tier>/<arquivo>
+CARD_SIZE = 256
+THUMBNAIL_TIERS = {"md": 128, "sm": 64}
+# Qualidade WebP: 80 com method=6 fica visualmente igual ao original em ícones e
+# bem menor que o JPEG do Pixabay; miniaturas toleram um pouco menos de qualidade
+WEBP_QUALITY = 80
+THUMBNAIL_QUALITY = 75
+WEBP_METHOD = 6
+# cover: recorta o centro para preencher o quadrado; contain: encaixa com margem transparente
+FIT_MODES = ["cover", "contain"]
+
+
+def _no_background_removal(img):
+    return img
+
+
+def _rembg_background_removal(img):
+    try:
+        from rembg import remove
+    except ImportError:
+        raise RuntimeError("rembg não instalado (pip install rembg)")
+    return remove(img)
+
+
+# Remoção de fundo: nome -> função(PIL.Image) -> PIL.Image.
+# Também aceita 'modulo:funcao' para plugar outra implementação sem editar este arquivo.
+BACKGROUND_REMOVERS = {
+    "none": _no_background_removal,
+    "rembg": _rembg_background_removal,
+}
+
+
+@lru_cache(maxsize=None)
+def load_background_remover(spec):
+    """Resolve o nome (ou 'modulo:funcao') da remoção de fundo; chamado em cada processo do pool"""
+    if spec in BACKGROUND_REMOVERS:
+        return BACKGROUND_REMOVERS[spec]
+    module, sep, func = spec.partition(":")
+    if not sep:
+        raise ValueError(f"Remoção de fundo desconhecida: '{spec}' (use {', '.join(BACKGROUND_REMOVERS)} ou modulo:funcao)")
+    return getattr(importlib.import_module(module), func)
+
+
+def settings_key(card_size=CARD_SIZE, quality=WEBP_QUALITY, fit="cover", background="none"):
+    """Identifica as configurações usadas; mudar qualquer uma reprocessa as imagens"""
+    tiers = ",".join(f"{k}{v}" for k, v in THUMBNAIL_TIERS.items())
+    return f"{card_size}:{quality}:{THUMBNAIL_QUALITY}:{WEBP_METHOD}:{fit}:{background}:{tiers}"
+
+
+def _encode_webp(img, quality):
+    buf = io.BytesIO()
+    img.save(buf, "WEBP", quality=quality, method=WEBP_METHOD)
+    return buf.getvalue()
+
+
+def _write_atomic(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def process_image(path, original_path, card_size=CARD_SIZE, quality=WEBP_QUALITY, fit="cover", background="none"):
+    """
+    Gera, a partir de original_path, o card em `path` e as miniaturas em <pasta>/<tier>/.
+    Devolve (bytes originais, bytes do card, sha256 do card).
+    """
+    with open(original_path, 'rb') as f:
+        original = f.read()
+    img = Image.open(io.BytesIO(original))
+    img = ImageOps.exif_transpose(img).convert("RGBA")
+
+    img = load_background_remover(background)(img)
+    if fit == "contain":
+        img = ImageOps.pad(img, (card_size, card_size), Image.LANCZOS, color=(0, 0, 0, 0))
+    else:
+        img = ImageOps.fit(img, (card_size, card_size), Image.LANCZOS)
+    # Sem transparência de verdade, o canal alfa só aumenta o arquivo
+    if img.getchannel("A").getextrema() == (255, 255):
+        img = img.convert("RGB")
+
+    card = _encode_webp(img, quality)
+    folder, filename = os.path.split(path)
+    for tier, size in THUMBNAIL_TIERS.items():
+        os.makedirs(os.path.join(folder, tier), exist_ok=True)
+        thumb = img.resize((size, size), Image.LANCZOS)
+        _write_atomic(os.path.join(folder, tier, filename), _encode_webp(thumb, THUMBNAIL_QUALITY))
+    _write_atomic(path, card)
+    return len(original), len(card), hashlib.sha256(card).hexdigest()
+
+
+def _process_task(task):
+    """Roda em um processo do pool; erros voltam como texto para o processo principal contar"""
+    filename, path, original_path, options = task
+    try:
+        return filename, process_image(path, original_path, **options), None
+    except Exception as e:
+        return filename, None, f"{type(e).__name__}: {e}"
+
+
+def process_assets(manifest, filenames=None, workers=None, **options):
+    """
+    Processa as imagens do manifesto que ainda não passaram por estas configurações
+    (ou só `filenames`), em um pool de processos. Devolve {processed, failed, bytes_in, bytes_out}.
+    """
+    stats = {"processed": 0, "failed": 0, "bytes_in": 0, "bytes_out": 0}
+    if Image is None:
+        print("Pillow não instalado (pip install pillow): pós-processamento ignorado.")
+        return stats
+    load_background_remover(options.get("background", "none"))
+
+    key = settings_key(**options)
+    if filenames is None:
+        # Todas as imagens completas da pasta (as antigas, sem registro, entram no manifesto aqui)
+        filenames = sorted(
+            name for name in os.listdir(manifest.output_dir)
+            if os.path.isfile(os.path.join(manifest.output_dir, name))
+            and not name.endswith((PART_SUFFIX, ".json", ".tmp"))
+            and manifest.is_complete(name)
+        )
+    tasks = []
+    for name in filenames:
+        if not manifest.needs_processing(name, key):
+            continue
+        original = manifest.keep_original(name)
+        if original is None:
+            # Reprocessar o card anterior acumularia perdas (ou ampliaria uma imagem já reduzida)
+            print(f"  [{name}] Sem o original em {manifest.originals_dir}: apague a imagem para baixá-la de novo")
+            stats["failed"] += 1
+            continue
+        tasks.append((name, os.path.join(manifest.output_dir, name), original, options))
+    if not tasks:
+        return stats
+
+    workers = workers or os.cpu_count() or 1
+    with stage("images.process"):
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_process_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+        else:
+            results = [_process_task(t) for t in tasks]
+
+    for filename, result, error in results:
+        if error:
+            print(f"  [{filename}] Erro no processamento: {error}")
+            stats["failed"] += 1
+            continue
+        bytes_in, bytes_out, sha256 = result
+        manifest.mark_processed(filename, bytes_out, sha256, key)
+        stats["processed"] += 1
+        stats["bytes_in"] += bytes_in
+        stats["bytes_out"] += bytes_out
+    manifest.save()
+    count("images.processed", stats["processed"])
+    count("bytes.before_processing", stats["bytes_in"])
+    count("bytes.after_processing", stats["bytes_out"])
+    return stats
+
+
+def print_stats(stats):
+    saved = 1 - stats["bytes_out"] / stats["bytes_in"] if stats["bytes_in"] else 0
+    print(f"{stats['processed']} imagens processadas, {stats['failed']} com erro; "
+          f"{stats['bytes_in'] / 1024:.0f} KiB -> {stats['bytes_out'] / 1024:.0f} KiB ({saved:.0%} menor)")
+
+
+def add_process_arguments(parser):
+    parser.add_argument("--process-workers", type=int, default=None,
+                        help="Processos do pós-processamento (padrão: número de CPUs)")
+    parser.add_argument("--card-size", type=int, default=CARD_SIZE, help="Lado da imagem do card (px)")
+    parser.add_argument("--quality", type=int, default=WEBP_QUALITY, help="Qualidade WebP do card (0-100)")
+    parser.add_argument("--fit", choices=FIT_MODES, default="cover")
+    parser.add_argument("--background", default="none",
+                        help=f"Remoção de fundo: {', '.join(BACKGROUND_REMOVERS)} ou modulo:funcao")
+
+
+def process_options(args):
+    return {"card_size": args.card_size, "quality": args.quality, "fit": args.fit, "background": args.background}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converte as imagens do mercado em WebP no tamanho do card, com miniaturas")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    add_process_arguments(parser)
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.start(args.profile)
+    try:
+        load_background_remover(args.background)
+    except (ValueError, ImportError, AttributeError) as e:
+        print(f"ERRO: {e}", file=sys.stderr)
+        sys.exit(2)
+    print_stats(process_assets(AssetManifest(args.output_dir), workers=args.process_workers, **process_options(args)))
@@ -0,0 +1,257 @@
+import os
+import json
+import base64
+import shutil
+import hashlib
+import threading
+import http.client
+
+from http_pool import HTTPStatusError
+from instrumentation import count, stage
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Tamanho e hash de cada imagem baixada, por diretório de saída
+MANIFEST_PATH = os.path.join(BASE_DIR, '.cache', 'market_assets.json')
+CHUNK_SIZE = 64 * 1024
+PART_SUFFIX = ".part"
+# Arquivos como foram baixados, fora de public/ para não irem junto com o site;
+# o pós-processamento sempre parte deles (uma subpasta por diretório de saída)
+ORIGINALS_DIR = os.path.join(BASE_DIR, '.cache', 'market_originals')
+# Tentativas por imagem; cada nova tentativa continua o .part via Range
+MAX_ATTEMPTS = 3
+
+
+class IncompleteDownload(Exception):
+    pass
+
+
+def file_digests(path, chunk_size=CHUNK_SIZE):
+    """(sha256, md5) do arquivo, lido em blocos"""
+    sha, md5 = hashlib.sha256(), hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+            md5.update(chunk)
+    return sha.hexdigest(), md5.hexdigest()
+
+
+def file_sha256(path):
+    return file_digests(path)[0]
+
+
+def looks_complete(path):
+    """
+    Checagem barata de imagens baixadas antes do manifesto existir: o arquivo termina
+    onde o formato diz que termina (JPEG FFD9, PNG IEND, GIF 3B, tamanho RIFF do WebP)?
+    """
+    try:
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            head = f.read(12)
+            f.seek(max(0, size - 12))
+            tail = f.read()
+    except OSError:
+        return False
+    if head.startswith(b'\xff\xd8'):
+        return tail.rstrip(b'\x00').endswith(b'\xff\xd9')
+    if head.startswith(b'\x89PNG'):
+        return tail[-8:-4] == b'IEND'
+    if head.startswith(b'GIF8'):
+        return tail.endswith(b'\x3b')
+    if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+        return int.from_bytes(head[4:8], 'little') + 8 == size
+    return False
+
+
+class AssetManifest:
+    """
+    Registro (JSON) das imagens completas e verificadas: {arquivo: {size, sha256, url, processed, original}}.
+    Um arquivo só conta como baixado se o tamanho em disco bate com o registrado;
+    arquivos antigos sem registro são aceitos apenas se looks_complete().
+    """
+
+    def __init__(self, output_dir, path=MANIFEST_PATH, originals_dir=ORIGINALS_DIR):
+        self.output_dir = os.path.abspath(output_dir)
+        self.path = path
+        self.originals_dir = os.path.join(originals_dir, hashlib.sha256(self.output_dir.encode('utf-8')).hexdigest()[:16])
+        self.lock = threading.Lock()
+        self.all = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.all = json.load(f)
+        except (OSError, ValueError):
+            pass
+        self.entries = self.all.setdefault(self.output_dir, {})
+
+    def is_complete(self, filename, verify_hash=False):
+        path = os.path.join(self.output_dir, filename)
+        entry = self.entries.get(filename)
+        if entry is None:
+            if looks_complete(path):
+                self.record(filename, None, os.path.getsize(path), file_sha256(path))
+                return True
+            return False
+        try:
+            if os.path.getsize(path) != entry["size"]:
+                return False
+        except OSError:
+            return False
+        return not verify_hash or file_sha256(path) == entry["sha256"]
+
+    def record(self, filename, url, size, sha256):
+        """Registra um download novo; o arquivo em disco passa a ser o original (a cópia antiga é descartada)"""
+        with self.lock:
+            self.entries[filename] = {"size": size, "sha256": sha256, "url": url}
+
+    def needs_processing(self, filename, settings):
+        """True se o arquivo ainda não passou pelo pós-processamento com estas configurações"""
+        with self.lock:
+            entry = self.entries.get(filename)
+        return entry is not None and entry.get("processed") != settings
+
+    def original_path(self, filename):
+        return os.path.join(self.originals_dir, filename)
+
+    def keep_original(self, filename):
+        """
+        Devolve o caminho do original em originals_dir, copiando o arquivo baixado para lá
+        antes do primeiro processamento. None se não há original: o arquivo em disco já é
+        um card processado antes de os originais serem guardados.
+        """
+        path = self.original_path(filename)
+        with self.lock:
+            entry = self.entries.get(filename)
+            if entry is None:
+                return None
+            if "original" in entry:
+                return path if os.path.isfile(path) else None
+            if entry.get("processed"):
+                return None
+            original = {"size": entry["size"], "sha256": entry["sha256"]}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        shutil.copyfile(os.path.join(self.output_dir, filename), tmp)
+        os.replace(tmp, path)
+        with self.lock:
+            entry["original"] = original
+        return path
+
+    def mark_processed(self, filename, size, sha256, settings):
+        """Atualiza tamanho e hash para o card processado (o original continua em originals_dir)"""
+        with self.lock:
+            entry = self.entries.setdefault(filename, {"url": None})
+            entry.update(size=size, sha256=sha256, processed=settings)
+
+    def save(self):
+        with self.lock:
+            data = json.dumps(self.all, ensure_ascii=False, indent=1)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+
+def _content_md5(resp):
+    value = resp.getheader("Content-MD5")
+    if not value:
+        return None
+    try:
+        return base64.b64decode(value).hex()
+    except ValueError:
+        return None
+
+
+def _resume_state(part_path, url):
+    """(bytes já baixados, ETag) de um .part anterior da mesma URL"""
+    meta_path = part_path + ".json"
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("url") == url:
+            return os.path.getsize(part_path), meta.get("etag")
+    except (OSError, ValueError):
+        pass
+    return 0, None
+
+
+def _download_once(pool, url, part_path):
+    """Baixa (ou continua) `url` em part_path; devolve (tamanho total esperado, md5 do servidor)"""
+    offset, etag = _resume_state(part_path, url)
+    headers = {}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        if etag:
+            headers["If-Range"] = etag
+
+    try:
+        with pool.open(url, headers) as resp:
+            if resp.status == 206:
+                # Content-Range: bytes inicio-fim/total
+                start = int(resp.getheader("Content-Range", "bytes 0-").split()[1].split("-")[0])
+                if start != offset:
+                    raise IncompleteDownload(f"Content-Range inesperado para {url}")
+                total = int(resp.getheader("Content-Range").rsplit("/", 1)[1])
+                mode = 'ab'
+                count("downloads.resumed")
+            else:
+                # Servidor ignorou o Range (ou o arquivo mudou): recomeça do zero
+                offset = 0
+                length = resp.getheader("Content-Length")
+                total = int(length) if length is not None else None
+                mode = 'wb'
+            with open(part_path + ".json", 'w', encoding='utf-8') as meta:
+                json.dump({"url": url, "etag": resp.getheader("ETag")}, meta)
+
+            with open(part_path, mode) as f:
+                while True:
+                    chunk = resp.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    count("bytes.downloaded", len(chunk))
+                f.flush()
+                os.fsync(f.fileno())
+            return total, _content_md5(resp) if mode == 'wb' else None
+    except HTTPStatusError as e:
+        if e.code == 416 and offset:
+            # Range fora do arquivo: o .part não corresponde mais; recomeça do zero
+            os.remove(part_path)
+            raise IncompleteDownload(f"Range recusado para {url}")
+        raise
+
+
+def stream_download(pool, url, final_path):
+    """
+    Baixa `url` em blocos para final_path + '.part' e só renomeia para o nome final
+    (os.replace, atômico) depois de conferir o tamanho com o Content-Length/Content-Range
+    e o Content-MD5, quando o servidor envia. Uma conexão interrompida deixa o .part,
+    que a próxima tentativa (ou a próxima execução) continua com um pedido Range.
+    Devolve (tamanho, sha256).
+    """
+    part_path = final_path + PART_SUFFIX
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            with stage("http.download"):
+                total, md5 = _download_once(pool, url, part_path)
+        except (IncompleteDownload, http.client.IncompleteRead, ConnectionError, TimeoutError) as e:
+            if attempt == MAX_ATTEMPTS:
+                raise IncompleteDownload(f"{url}: {e}")
+            continue
+
+        size = os.path.getsize(part_path)
+        if total is not None and size != total:
+            if attempt == MAX_ATTEMPTS:
+                raise IncompleteDownload(f"{url}: {size} de {total} bytes")
+            continue
+        sha256, actual_md5 = file_digests(part_path)
+        if md5 is not None and actual_md5 != md5:
+            os.remove(part_path)
+            raise IncompleteDownload(f"{url}: Content-MD5 não confere")
+
+        os.replace(part_path, final_path)
+        try:
+            os.remove(part_path + ".json")
+        except OSError:
+            pass
+        return size, sha256
@@ -0,0 +1,168 @@
+import argparse
+import base64
+import hashlib
+import io
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Servidor local que imita as buscas do Pixabay (/api/) e do Unsplash (/search/photos)
+# e serve as imagens dos resultados (/images/<nome>.jpg), com keep-alive.
+# Uso: python asset_stub_server.py --port 8090
+#      python market_asset_downloader.py --pixabay-url http://127.0.0.1:8090/api/ \
+#          --unsplash-url http://127.0.0.1:8090/search/photos
+# GET /stats devolve quantas conexões e requisições o servidor recebeu.
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def make_image(name, size):
+    """Imagem determinística para `name`: JPEG real se o Pillow estiver instalado, senão bytes opacos"""
+    digest = hashlib.sha256(name.encode("utf-8")).digest()
+    if Image is not None:
+        img = Image.new("RGB", (size, size), tuple(digest[:3]))
+        img.paste(tuple(digest[3:6]), (size // 4, size // 4, 3 * size // 4, 3 * size // 4))
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=90)
+        return buf.getvalue()
+    return (digest * (size * size // len(digest) + 1))[:size * size]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    image_size = 640
+    empty_rate = 0.0
+    fail_rate = 0.0
+    truncate_rate = 0.0
+    latency = 0.0
+    lock = threading.Lock()
+    connections = 0
+    requests_seen = 0
+    images = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_image(self, body):
+        """Imagem com ETag, Content-MD5 e suporte a Range; truncate_rate simula conexões que caem"""
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        headers = {"ETag": etag, "Accept-Ranges": "bytes"}
+        m = re.match(r"bytes=(\d+)-$", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if m and (if_range is None or if_range == etag):
+            start = int(m.group(1))
+            if start >= len(body):
+                self._send(416, b"", "image/jpeg", {"Content-Range": f"bytes */{len(body)}"})
+                return
+            status, part = 206, body[start:]
+            headers["Content-Range"] = f"bytes {start}-{len(body) - 1}/{len(body)}"
+        else:
+            status, part = 200, body
+            headers["Content-MD5"] = base64.b64encode(hashlib.md5(body).digest()).decode()
+
+        if random.random() < self.truncate_rate and len(part) > 1:
+            self.send_response(status)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(part)))
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(part[:len(part) // 2])
+            self.close_connection = True
+            return
+        self._send(status, part, "image/jpeg", headers)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _image_url(self, query, n):
+        host = self.headers.get("Host", "127.0.0.1")
+        slug = hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]
+        return f"http://{host}/images/{slug}_{n}.jpg"
+
+    def _image(self, name):
+        with StubHandler.lock:
+            if name not in StubHandler.images:
+                StubHandler.images[name] = make_image(name, self.image_size)
+            return StubHandler.images[name]
+
+    def do_GET(self):
+        with StubHandler.lock:
+            StubHandler.requests_seen += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        url = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+
+        if url.path == "/stats":
+            self._send_json(200, {"connections": StubHandler.connections, "requests": StubHandler.requests_seen})
+            return
+        if random.random() < self.fail_rate:
+            self._send_json(503, {"error": "stub failure"})
+            return
+
+        if url.path.rstrip("/") == "/api":
+            query = params.get("q", "")
+            per_page = int(params.get("per_page", 3))
+            hits = [] if random.random() < self.empty_rate else [
+                {"id": n, "webformatURL": self._image_url(query, n)} for n in range(per_page)
+            ]
+            self._send_json(200, {"total": len(hits), "totalHits": len(hits), "hits": hits})
+        elif url.path.rstrip("/") == "/search/photos":
+            query = params.get("query", "")
+            per_page = int(params.get("per_page", 3))
+            results = [] if random.random() < self.empty_rate else [
+                {"id": str(n), "urls": {"small": self._image_url(query, n)}} for n in range(per_page)
+            ]
+            self._send_json(200, {"total": len(results), "results": results})
+        elif url.path.startswith("/images/"):
+            self._send_image(self._image(url.path))
+        else:
+            self._send_json(404, {"error": "not found"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub local das APIs de imagens (Pixabay/Unsplash)")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--image-size", type=int, default=640, help="Lado das imagens servidas (px)")
+    parser.add_argument("--empty-rate", type=float, default=0.0, help="Fração de buscas sem resultado")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fração de respostas 503")
+    parser.add_argument("--truncate-rate", type=float, default=0.0,
+                        help="Fração de imagens cortadas no meio (para testar a retomada via Range)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Atraso por resposta (segundos)")
+    args = parser.parse_args()
+
+    StubHandler.image_size = args.image_size
+    StubHandler.empty_rate = args.empty_rate
+    StubHandler.fail_rate = args.fail_rate
+    StubHandler.truncate_rate = args.truncate_rate
+    StubHandler.latency = args.latency
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    print(f"Stub das APIs de imagens ouvindo em http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+
+from pdf_text_cache import BASE_DIR
+
+CACHE_PATH = os.path.join(BASE_DIR, '.cache', 'audit_responses.sqlite')
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+# Endpoint usado pelo cliente da OpenAI quando nenhum base_url é informado
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+def response_key(model, system_prompt, user_prompt, temperature, base_url=None):
+    """
+    Hash do conteúdo da requisição; o prompt do usuário já inclui o trecho do PDF e o código.
+    O endpoint entra na chave para que respostas de um stub local nunca sejam servidas
+    como resultado da API real.
+    """
+    endpoint = (base_url or DEFAULT_BASE_URL).rstrip("/")
+    payload = json.dumps([endpoint, model, system_prompt, user_prompt, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Cache em disco (SQLite) das respostas do LLM, endereçado pelo conteúdo do prompt.
+    Mantém o tamanho total abaixo de max_bytes removendo as entradas menos usadas (LRU).
+    Pode ser usado por várias threads ao mesmo tempo.
+    """
+
+    def __init__(self, cache_path=CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        self.conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self.conn:
+                self.conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key, response):
+        size = len(response.encode('utf-8'))
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time()),
+            )
+            self._evict()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            entries, total = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,129 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+from instrumentation import count, stage
+
+# Status HTTP que valem nova tentativa (rate limit e falhas do servidor)
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def estimate_tokens(*texts):
+    """Estimativa grosseira (~4 caracteres por token), suficiente para o orçamento por minuto"""
+    return sum(len(t) for t in texts) // 4 + 1
+
+
+class RateLimiter:
+    """
+    Dois token buckets (requisições/minuto e tokens/minuto) compartilhados entre as threads.
+    acquire() bloqueia até haver orçamento para a requisição.
+    Um limite igual a 0 desativa o bucket correspondente (sem limite).
+    """
+
+    def __init__(self, rpm=60, tpm=30000):
+        if rpm < 0 or tpm < 0:
+            raise ValueError(f"Limites de rate limit inválidos: rpm={rpm}, tpm={tpm} (use 0 para sem limite)")
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = float(rpm)
+        self.tokens = float(tpm)
+        self.updated = time.monotonic()
+        self.cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated
+        self.updated = now
+        self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60)
+        self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60)
+
+    def acquire(self, tokens):
+        # Uma requisição maior que o orçamento inteiro espera o bucket encher e passa sozinha
+        tokens = min(tokens, self.tpm) if self.tpm else 0
+        with self.cond:
+            while True:
+                self._refill()
+                requests_ok = not self.rpm or self.requests >= 1
+                if requests_ok and self.tokens >= tokens:
+                    if self.rpm:
+                        self.requests -= 1
+                    self.tokens -= tokens
+                    return
+                wait = max(
+                    (1 - self.requests) * 60 / self.rpm if self.rpm else 0,
+                    (tokens - self.tokens) * 60 / self.tpm if self.tpm else 0,
+                )
+                self.cond.wait(timeout=max(wait, 0.01))
+
+
+class AuditEngine:
+    """
+    Executa as auditorias em paralelo (thread pool) respeitando o RateLimiter,
+    com novas tentativas para 429/5xx. Os resultados voltam na ordem dos jobs.
+    """
+
+    def __init__(self, auditor, concurrency=4, rpm=60, tpm=30000, max_retries=5, backoff_base=1.0,
+                 system_prompt=""):
+        self.auditor = auditor
+        # Entra na estimativa de tokens: o prompt de sistema vai em toda requisição
+        self.system_prompt = system_prompt
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rpm, tpm)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+
+    def run(self, jobs):
+        """
+        jobs: lista de dicts com item_name, pdf_text, code_text e file_name.
+        Gera cada resultado assim que ele e os anteriores ficam prontos, sem esperar o lote todo.
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            yield from pool.map(self._run_job, jobs)
+
+    def _retry_delay(self, attempt, error):
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        # Backoff exponencial com "full jitter"
+        return random.uniform(0, self.backoff_base * (2 ** attempt))
+
+    def _run_job(self, job):
+        item_name = job["item_name"]
+        # Respostas em cache não consomem orçamento de rate limit nem exigem cliente
+        cached = self.auditor.cached_response(**job)
+        if cached is not None:
+            count("llm.cache_hits")
+            return cached
+        if not self.auditor.client:
+            return f"ERRO: OpenAI API Key não configurada para {item_name}"
+
+        tokens = estimate_tokens(self.system_prompt, self.auditor.build_user_prompt(**job))
+        for attempt in range(self.max_retries + 1):
+            with stage("llm.rate_limit_wait"):
+                self.limiter.acquire(tokens)
+            try:
+                print(f" -> Auditando {item_name}...")
+                count("llm.requests")
+                count("llm.tokens_sent", tokens)
+                with stage("llm.request"):
+                    return self.auditor.request_audit(**job)
+            except (openai.APIConnectionError, openai.APIStatusError) as e:
+                status = getattr(e, "status_code", None)
+                retryable = status is None or status in RETRYABLE_STATUS
+                if not retryable or attempt == self.max_retries:
+                    return f"ERRO na API para {item_name}: {str(e)}"
+                delay = self._retry_delay(attempt, e)
+                count("llm.retries")
+                print(f"    {item_name}: erro {status or 'de conexão'}, nova tentativa em {delay:.1f}s")
+                time.sleep(delay)
+            except Exception as e:
+                return f"ERRO na API para {item_name}: {str(e)}"
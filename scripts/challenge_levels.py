@@ -0,0 +1,125 @@
+import os
+import re
+import json
+from functools import lru_cache
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THREAT_SHEET_PATH = os.path.join(BASE_DIR, 'src', 'interfaces', 'ThreatSheet.ts')
+# Enum já interpretado, invalidado pelo tamanho/mtime de ThreatSheet.ts
+CACHE_PATH = os.path.join(BASE_DIR, '.cache', 'challenge_levels.json')
+
+# Níveis acima de 20 no livro (S e S+) entram depois do ND 20 na ordenação
+SPECIAL_LEVELS = {"S": 21, "S+": 22}
+
+
+def load_enum(source, name):
+    """Lê `export enum Nome { MEMBRO = "valor", ... }` e devolve [(membro, valor)]"""
+    m = re.search(r'export\s+enum\s+' + name + r'\s*\{([^}]*)\}', source)
+    if not m:
+        return []
+    return re.findall(r'(\w+)\s*=\s*["\']([^"\']*)["\']', m.group(1))
+
+
+def level_value(label):
+    """'1/4' -> 0.25, '7' -> 7.0, 'S+' -> 22.0 (None se não for um ND)"""
+    if label in SPECIAL_LEVELS:
+        return float(SPECIAL_LEVELS[label])
+    num, sep, den = label.partition('/')
+    try:
+        return float(num) / float(den) if sep else float(num)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def level_key(value):
+    """Chave normalizada usada nas tabelas e relatórios: 0.25 -> '0.25', 1/3 -> '0.33', 5.0 -> '5'"""
+    return f"{round(value, 2):g}"
+
+
+def _read_members(path, cache_path):
+    st = os.stat(path)
+    stamp = {"path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if all(cached.get(k) == v for k, v in stamp.items()):
+            return [tuple(m) for m in cached["members"]]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    with open(path, 'r', encoding='utf-8') as f:
+        members = load_enum(f.read(), "ChallengeLevel")
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(stamp, members=members), f)
+    except OSError as e:
+        print(f"Aviso: não foi possível salvar o cache de NDs: {e}")
+    return members
+
+
+class ChallengeLevels:
+    """
+    O enum ChallengeLevel de ThreatSheet.ts compilado em tabelas de consulta.
+    lookup aceita todas as grafias usadas no projeto ('ChallengeLevel.HALF', 'HALF', '1/2',
+    '0.5', '0,5') e devolve a chave normalizada; label/member/value fazem o caminho inverso.
+    """
+
+    def __init__(self, members):
+        self.members = members
+        self.lookup = {}
+        self.label = {}
+        self.member = {}
+        self.value = {}
+        for name, label in members:
+            value = level_value(label)
+            if value is None:
+                continue
+            key = level_key(value)
+            self.label[key] = label
+            self.member[key] = name
+            self.value[key] = value
+            for alias in (f"ChallengeLevel.{name}", name, label, key, key.replace('.', ',')):
+                self.lookup.setdefault(alias, key)
+        # Chaves em ordem crescente de ND
+        self.keys = sorted(self.value, key=self.value.get)
+
+    @classmethod
+    def load(cls, path=THREAT_SHEET_PATH, cache_path=CACHE_PATH):
+        return cls(_read_members(path, cache_path))
+
+    def normalize(self, val):
+        key = self.lookup.get(val)
+        if key is not None:
+            return key
+        text = str(val).strip().replace('\n', ' ')
+        return self.lookup.get(text, text.replace(',', '.'))
+
+    def sort_key(self, nd):
+        """Valor numérico para ordenar NDs; desconhecidos vão para o fim"""
+        return self.value.get(self.normalize(nd), float('inf'))
+
+
+@lru_cache(maxsize=None)
+def get_levels():
+    """Instância compartilhada (lida uma vez por processo)"""
+    return ChallengeLevels.load()
+
+
+def normalize_nd(val):
+    return get_levels().normalize(val)
+
+
+def nd_value(nd):
+    """ND normalizado -> número (None se desconhecido)"""
+    return get_levels().value.get(normalize_nd(nd))
+
+
+def nd_label(nd):
+    """ND normalizado -> como aparece no app e no livro ('0.5' -> '1/2')"""
+    return get_levels().label.get(nd, nd)
+
+
+def nd_member(nd):
+    """ND normalizado -> membro do enum ('0.5' -> 'HALF')"""
+    return get_levels().member.get(nd)
@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+
+from challenge_levels import normalize_nd
+from ts_scanner import iter_declarations
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMBAT_TABLES_PATH = os.path.join(BASE_DIR, 'src', 'data', 'threats', 'combatTables.ts')
+
+ROLES = ["solo", "lacaio", "especial"]
+ROLE_TABLES = {
+    "solo": "SOLO_COMBAT_TABLE",
+    "lacaio": "LACAIO_COMBAT_TABLE",
+    "especial": "ESPECIAL_COMBAT_TABLE",
+}
+# Mesma ordem e nomes de CombatStatsEntry em combatTables.ts
+STAT_FIELDS = [
+    "attackValue",
+    "averageDamage",
+    "defense",
+    "strongSave",
+    "mediumSave",
+    "weakSave",
+    "hitPoints",
+    "standardEffectDC",
+]
+# Faixa de tolerância por estatística: max(absoluta, relativa * esperado)
+ABS_TOLERANCE = np.array([3, 5, 3, 3, 3, 3, 10, 2], dtype=float)
+REL_TOLERANCE = np.array([0.15, 0.25, 0.10, 0.20, 0.20, 0.30, 0.25, 0.10])
+
+
+def role_key(role):
+    """'ThreatRole.LACAIO', 'Lacaio' ou 'lacaio' -> 'lacaio' (None se desconhecido)"""
+    if not role:
+        return None
+    key = str(role).split('.')[-1].lower()
+    return key if key in ROLES else None
+
+
+class CombatTables:
+    """
+    As três tabelas de combate como um array (papel, ND, estatística).
+    nd_keys segue a ordem das linhas em combatTables.ts; nd_index mapeia o ND
+    normalizado (ex: '0.5') para a linha.
+    """
+
+    def __init__(self, nd_keys, values):
+        self.nd_keys = nd_keys
+        self.nd_index = {nd: i for i, nd in enumerate(nd_keys)}
+        self.values = values
+
+    @classmethod
+    def load(cls, path=COMBAT_TABLES_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            declarations = {name: value for name, _, value in iter_declarations(f.read())}
+
+        nd_keys = []
+        for role in ROLES:
+            for row in declarations.get(ROLE_TABLES[role], []):
+                nd = normalize_nd(row.get("nd"))
+                if nd not in nd_keys:
+                    nd_keys.append(nd)
+
+        values = np.full((len(ROLES), len(nd_keys), len(STAT_FIELDS)), np.nan)
+        for r, role in enumerate(ROLES):
+            for row in declarations.get(ROLE_TABLES[role], []):
+                n = nd_keys.index(normalize_nd(row.get("nd")))
+                values[r, n] = [row.get(field, np.nan) for field in STAT_FIELDS]
+        return cls(nd_keys, values)
+
+    def deviations(self, role_idx, nd_idx, observed):
+        """
+        Compara em uma única passada vetorizada.
+        role_idx, nd_idx: arrays (n,) de índices (-1 = desconhecido);
+        observed: array (n, estatísticas) com NaN onde a ameaça não define o valor.
+        Retorna (esperado, score), onde |score| > 1 indica valor fora da faixa de tolerância.
+        """
+        valid = (role_idx >= 0) & (nd_idx >= 0)
+        expected = np.full(observed.shape, np.nan)
+        expected[valid] = self.values[role_idx[valid], nd_idx[valid]]
+        band = np.maximum(ABS_TOLERANCE, REL_TOLERANCE * np.abs(expected))
+        score = (observed - expected) / band
+        return expected, score
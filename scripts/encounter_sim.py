@@ -0,0 +1,388 @@
+import os
+import re
+import sys
+import math
+import argparse
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from combat_tables import COMBAT_TABLES_PATH, ROLES, STAT_FIELDS, CombatTables, role_key
+from challenge_levels import BASE_DIR, nd_label, nd_value, normalize_nd
+
+# Colunas de cada combatente nas matrizes da simulação
+ATTACK, DAMAGE, DEFENSE, HP = range(4)
+COMBATANT_FIELDS = ["attackValue", "averageDamage", "defense", "hitPoints"]
+COMBATANT_COLUMNS = [STAT_FIELDS.index(f) for f in COMBATANT_FIELDS]
+
+PARTY_SIZE = 4
+CLASSES_DIR = os.path.join(BASE_DIR, 'src', 'data', 'classes')
+EQUIPMENT_PATH = os.path.join(BASE_DIR, 'src', 'data', 'equipamentos.ts')
+# Grupo de referência: uma ficha de cada classe (a lista se repete em grupos maiores)
+REFERENCE_CLASSES = ["guerreiro", "paladino", "ladino", "clerigo"]
+# Equipamento das fichas de referência, lido de equipamentos.ts
+REFERENCE_WEAPON = "Espada Longa"
+REFERENCE_ARMOR = "Cota de Malha"
+REFERENCE_SHIELD = "Escudo Leve"
+# Progressão das fichas de referência: atributo-chave +3 no 1º nível e +1 a cada 4 níveis,
+# Constituição +2, Destreza +1; melhorias mágicas de arma e armadura +1 a cada 4 níveis
+KEY_ATTRIBUTE_START = 3
+ATTRIBUTE_INCREASE_EVERY = 4
+CONSTITUTION_MOD = 2
+DEXTERITY_MOD = 1
+ITEM_BONUS_EVERY = 4
+# Poderes, magias e habilidades de classe, que as fichas básicas não têm: ataque por nível,
+# dano por nível vezes o multiplicador do patamar e PV extras por patamar acima do Iniciante.
+# Calibrados para que o grupo de nível X contra um solo de ND X das COMBAT_TABLES perca
+# entre ~20% e ~65% dos PV (ND 1 a S): longe de 0% e de 100%, a simulação ainda
+# distingue uma ameaça mais forte ou mais fraca que a tabela
+ATTACK_PER_LEVEL = 1.5
+DAMAGE_PER_LEVEL = 2.5
+HIT_POINTS_PER_TIER = 0.5
+# Lutas que passam deste número de rodadas contam como derrota do grupo
+MAX_ROUNDS = 30
+# Combates simulados por tarefa do pool de processos
+CHUNK_TRIALS = 50000
+# Composição padrão do encontro por papel. Lacaios aparecem em dupla: com quatro, o grupo
+# de referência perde quase sempre e a comparação com a tabela deixa de ter sinal
+DEFAULT_GROUP = {"solo": 1, "lacaio": 2, "especial": 1}
+# Diferença máxima (taxa de vitória ou fração de PV perdida) até a ameaça ser sinalizada
+SIM_TOLERANCE = 0.15
+
+
+@lru_cache(maxsize=None)
+def class_hit_points(name):
+    """(pv, addpv) da classe, lidos de src/data/classes/<nome>.ts"""
+    path = os.path.join(CLASSES_DIR, f"{name}.ts")
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    pv = re.search(r'\bpv:\s*(\d+)', source)
+    addpv = re.search(r'\baddpv:\s*(\d+)', source)
+    if not pv or not addpv:
+        raise ValueError(f"PV da classe não encontrados em {path}")
+    return int(pv.group(1)), int(addpv.group(1))
+
+
+@lru_cache(maxsize=None)
+def equipment_stats(name):
+    """Campos numéricos e o dano de um item de equipamentos.ts, pelo nome"""
+    with open(EQUIPMENT_PATH, 'r', encoding='utf-8') as f:
+        source = f.read()
+    m = re.search(r"nome:\s*'" + re.escape(name) + r"',([^}]*)\}", source)
+    if not m:
+        raise ValueError(f"Equipamento '{name}' não encontrado em {EQUIPMENT_PATH}")
+    stats = {k: int(v) for k, v in re.findall(r'(\w+):\s*(-?\d+)\s*,', m.group(1))}
+    dice = re.search(r"dano:\s*'(\d+)d(\d+)'", m.group(1))
+    if dice:
+        count, sides = int(dice.group(1)), int(dice.group(2))
+        stats["averageDamage"] = count * (sides + 1) / 2
+    return stats
+
+
+def training_bonus(level):
+    """Bônus de treinamento por nível, o mesmo de recalculateSheet.ts"""
+    if level >= 15:
+        return 6
+    if level >= 7:
+        return 4
+    return 2
+
+
+def tier_multiplier(level):
+    """
+    Multiplicador do patamar, como em getRecommendedAbilityCount() (threatGenerator.ts):
+    Iniciante 1, Veterano 2, Campeão 3, Lenda 4; cada nível acima do 20º (S, S+) soma um
+    """
+    if level <= 4:
+        return 1
+    if level <= 10:
+        return 2
+    if level <= 16:
+        return 3
+    if level <= 20:
+        return 4
+    return level - 16
+
+
+def party_level(nd):
+    """
+    Nível dos personagens para o ND: o livro equilibra um solo de ND X contra um grupo de nível X.
+    NDs fracionários usam o 1º nível; S e S+ (21 e 22) seguem a progressão além do 20º.
+    """
+    value = nd_value(nd)
+    if value is None:
+        return None
+    return max(1, math.ceil(value))
+
+
+def reference_party(nd, size=PARTY_SIZE):
+    """
+    Grupo de referência com fichas de personagem do nível do ND: PV das classes,
+    ataque com metade do nível + treinamento + atributo, Defesa e dano do equipamento,
+    itens mágicos e os bônus de poderes calibrados acima.
+    Use --party com fichas reais para encontros específicos.
+    """
+    level = party_level(nd)
+    if level is None:
+        return None
+    key_mod = KEY_ATTRIBUTE_START + level // ATTRIBUTE_INCREASE_EVERY
+    item_bonus = level // ITEM_BONUS_EVERY
+    weapon = equipment_stats(REFERENCE_WEAPON)
+    armor = equipment_stats(REFERENCE_ARMOR)
+    shield = equipment_stats(REFERENCE_SHIELD)
+    tier = tier_multiplier(level)
+    atk = level // 2 + training_bonus(level) + key_mod + item_bonus + ATTACK_PER_LEVEL * level
+    dmg = weapon["averageDamage"] + key_mod + item_bonus + DAMAGE_PER_LEVEL * level * tier
+    defense = 10 + DEXTERITY_MOD + armor["defenseBonus"] + shield["defenseBonus"] + item_bonus
+    members = []
+    for i in range(size):
+        pv, addpv = class_hit_points(REFERENCE_CLASSES[i % len(REFERENCE_CLASSES)])
+        hp = pv + CONSTITUTION_MOD + (level - 1) * (addpv + CONSTITUTION_MOD)
+        hp *= 1 + HIT_POINTS_PER_TIER * (tier - 1)
+        members.append([atk, dmg, defense, hp])
+    return np.array(members, dtype=float)
+
+
+def parse_party(spec):
+    """'ataque/dano/defesa/pv;...' -> matriz (personagens, 4)"""
+    rows = [[float(v) for v in member.split('/')] for member in spec.split(';') if member.strip()]
+    if not rows or any(len(r) != 4 for r in rows):
+        raise ValueError(f"Grupo inválido: '{spec}' (use ataque/dano/defesa/pv;...)")
+    return np.array(rows)
+
+
+def parse_encounter(spec):
+    """'solo:1,lacaio:4' -> [(papel, quantidade)]"""
+    if not spec:
+        return None
+    group = []
+    for part in spec.split(','):
+        role, _, count = part.strip().partition(':')
+        key = role_key(role)
+        if key is None:
+            raise ValueError(f"Papel inválido no encontro: '{role}'")
+        group.append((key, int(count or 1)))
+    return group
+
+
+def threat_block(tables, role, nd):
+    """Linha (ataque, dano, defesa, pv) da COMBAT_TABLE do papel para o ND normalizado"""
+    n = tables.nd_index.get(nd)
+    if n is None:
+        return None
+    row = tables.values[ROLES.index(role), n, COMBATANT_COLUMNS]
+    return None if np.isnan(row).any() else row
+
+
+def encounter_threats(tables, nd, group):
+    """Matriz (ameaças, 4) para o encontro; None se algum papel não tiver linha neste ND"""
+    blocks = []
+    for role, count in group:
+        row = threat_block(tables, role, nd)
+        if row is None:
+            return None
+        blocks.extend([row] * count)
+    return np.array(blocks)
+
+
+def _attack(rng, attackers, attacker_hp, defenders, defender_hp, focus):
+    """
+    Um turno de ataques de um lado, vetorizado sobre os combates.
+    attackers/defenders: (combatentes, 4); *_hp: (combates, combatentes), alterado no lugar.
+    focus=True: todos atacam o primeiro defensor vivo (o grupo concentra fogo);
+    senão cada atacante escolhe um defensor vivo ao acaso.
+    20 natural sempre acerta e causa dano dobrado; 1 natural sempre erra.
+    """
+    m, a = attacker_hp.shape
+    if m == 0:
+        return
+    d = defender_hp.shape[1]
+    alive_def = defender_hp > 0
+    if focus:
+        target = np.broadcast_to(np.argmax(alive_def, axis=1)[:, None], (m, a))
+    else:
+        target = np.argmax(rng.random((m, a, d)) * alive_def[:, None, :], axis=2)
+    rolls = rng.integers(1, 21, size=(m, a))
+    hit = (
+        (attacker_hp > 0)
+        & (rolls != 1)
+        & ((rolls == 20) | (rolls + attackers[:, ATTACK] >= defenders[target, DEFENSE]))
+    )
+    damage = np.where(hit, attackers[:, DAMAGE] * np.where(rolls == 20, 2, 1), 0.0)
+    rows = np.broadcast_to(np.arange(m)[:, None], (m, a))
+    np.add.at(defender_hp, (rows, target), -damage)
+
+
+def simulate(party, threats, trials, rng, max_rounds=MAX_ROUNDS):
+    """
+    Simula `trials` combates independentes do grupo contra as ameaças, todos de uma vez.
+    A iniciativa (quem age primeiro em cada rodada) é sorteada por combate.
+    Devolve (vitória do grupo, rodadas, fração dos PV do grupo perdida), arrays (trials,).
+    """
+    party_hp = np.tile(party[:, HP], (trials, 1))
+    threat_hp = np.tile(threats[:, HP], (trials, 1))
+    party_first = rng.random(trials) < 0.5
+    rounds = np.zeros(trials, dtype=np.int64)
+    active = np.arange(trials)
+
+    for r in range(1, max_rounds + 1):
+        if not len(active):
+            break
+        rounds[active] = r
+        first = active[party_first[active]]
+        second = active[~party_first[active]]
+        for idx, party_turn in ((first, True), (first, False), (second, False), (second, True)):
+            php, thp = party_hp[idx], threat_hp[idx]
+            if party_turn:
+                _attack(rng, party, php, threats, thp, focus=True)
+            else:
+                _attack(rng, threats, thp, party, php, focus=False)
+            party_hp[idx], threat_hp[idx] = php, thp
+        done = ((party_hp[active] <= 0).all(axis=1)) | ((threat_hp[active] <= 0).all(axis=1))
+        active = active[~done]
+
+    win = (threat_hp <= 0).all(axis=1)
+    hp_loss = 1 - np.clip(party_hp, 0, None).sum(axis=1) / party[:, HP].sum()
+    return win, rounds, hp_loss
+
+
+def summarize(win, rounds, hp_loss):
+    return {
+        "trials": int(len(win)),
+        "win_rate": float(win.mean()),
+        "rounds": float(rounds.mean()),
+        "hp_loss": float(hp_loss.mean()),
+        "hp_loss_p50": float(np.percentile(hp_loss, 50)),
+        "hp_loss_p90": float(np.percentile(hp_loss, 90)),
+    }
+
+
+def _simulate_chunk(task):
+    party, threats, trials, seed, max_rounds = task
+    return simulate(party, threats, trials, np.random.default_rng(seed), max_rounds)
+
+
+def sweep(tables, group, nds=None, trials=100000, workers=1, seed=None, party=None,
+          party_size=PARTY_SIZE, max_rounds=MAX_ROUNDS):
+    """
+    Simula o encontro em cada ND (grupo de referência do ND, a menos que `party` seja fixo).
+    Os combates são divididos em blocos de CHUNK_TRIALS com sementes derivadas da semente
+    principal, então o resultado não depende do número de processos.
+    Devolve [(nd, resumo ou None)].
+    """
+    nds = nds or tables.nd_keys
+    seeds = np.random.SeedSequence(seed)
+    tasks, owners = [], []
+    for nd in nds:
+        threats = encounter_threats(tables, nd, group)
+        if threats is None:
+            continue
+        members = party if party is not None else reference_party(nd, party_size)
+        if members is None:
+            continue
+        for start in range(0, trials, CHUNK_TRIALS):
+            n = min(CHUNK_TRIALS, trials - start)
+            tasks.append((members, threats, n, seeds.spawn(1)[0], max_rounds))
+            owners.append(nd)
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate_chunk, tasks))
+    else:
+        results = [_simulate_chunk(t) for t in tasks]
+
+    by_nd = {}
+    for nd, result in zip(owners, results):
+        by_nd.setdefault(nd, []).append(result)
+    summaries = []
+    for nd in nds:
+        parts = by_nd.get(nd)
+        if not parts:
+            summaries.append((nd, None))
+            continue
+        summaries.append((nd, summarize(*(np.concatenate(col) for col in zip(*parts)))))
+    return summaries
+
+
+def difficulty_mismatches(threats, tables, trials=2000, seed=0):
+    """
+    Compara cada ameaça com a linha da COMBAT_TABLE do seu papel e ND no mesmo encontro
+    (DEFAULT_GROUP contra o grupo de referência do ND). As duas simulações usam a mesma
+    semente, então a diferença vem só das estatísticas.
+    Gera (ameaça, resumo da ameaça, resumo da tabela) quando a taxa de vitória ou o PV perdido
+    diferem mais que SIM_TOLERANCE.
+    """
+    reference = {}
+    for t in threats:
+        role, nd = role_key(t.get('role')), t.get('nd')
+        base = threat_block(tables, role, nd) if role else None
+        if base is None:
+            continue
+        observed = base.copy()
+        for col, field in enumerate(COMBATANT_FIELDS):
+            if field in t['combat']:
+                observed[col] = t['combat'][field][0]
+        if np.array_equal(observed, base):
+            continue
+
+        party = reference_party(nd)
+        if party is None:
+            continue
+        count = DEFAULT_GROUP[role]
+        if (role, nd) not in reference:
+            reference[(role, nd)] = summarize(*simulate(
+                party, np.tile(base, (count, 1)), trials, np.random.default_rng(seed)))
+        ref = reference[(role, nd)]
+        sim = summarize(*simulate(party, np.tile(observed, (count, 1)), trials, np.random.default_rng(seed)))
+        if (abs(sim["win_rate"] - ref["win_rate"]) > SIM_TOLERANCE
+                or abs(sim["hp_loss"] - ref["hp_loss"]) > SIM_TOLERANCE):
+            yield t, sim, ref
+
+
+def format_sweep(group, summaries):
+    label = ", ".join(f"{count}x {role}" for role, count in group)
+    lines = [
+        f"## Simulação: grupo contra {label}\n\n",
+        "| ND | Vitória | Rodadas | PV perdido (média) | p50 | p90 |\n",
+        "|---|---|---|---|---|---|\n",
+    ]
+    for nd, s in summaries:
+        if s is None:
+            lines.append(f"| {nd_label(nd)} | - | - | - | - | - |\n")
+            continue
+        lines.append(
+            f"| {nd_label(nd)} | {s['win_rate']:.1%} | {s['rounds']:.1f} | {s['hp_loss']:.1%} "
+            f"| {s['hp_loss_p50']:.1%} | {s['hp_loss_p90']:.1%} |\n"
+        )
+    return "".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulação Monte Carlo de encontros com as COMBAT_TABLES")
+    parser.add_argument("--encounter", default="solo:1",
+                        help="Ameaças do encontro por papel, ex: 'solo:1' ou 'lacaio:4,especial:1'")
+    parser.add_argument("--nd", default=None, help="NDs simulados, separados por vírgula (padrão: todos)")
+    parser.add_argument("--trials", type=int, default=100000, help="Combates simulados por ND")
+    parser.add_argument("--workers", type=int, default=1, help="Processos para a varredura")
+    parser.add_argument("--seed", type=int, default=None, help="Semente para resultados reproduzíveis")
+    parser.add_argument("--party", default=None,
+                        help="Grupo fixo 'ataque/dano/defesa/pv;...' (padrão: grupo de referência de cada ND)")
+    parser.add_argument("--party-size", type=int, default=PARTY_SIZE)
+    parser.add_argument("--max-rounds", type=int, default=MAX_ROUNDS)
+    args = parser.parse_args()
+
+    if not os.path.exists(COMBAT_TABLES_PATH):
+        print(f"ERRO: {COMBAT_TABLES_PATH} não encontrado")
+        sys.exit(2)
+    try:
+        group = parse_encounter(args.encounter)
+        party = parse_party(args.party) if args.party else None
+    except ValueError as e:
+        print(f"ERRO: {e}")
+        sys.exit(2)
+    tables = CombatTables.load(COMBAT_TABLES_PATH)
+    nds = [normalize_nd(nd) for nd in args.nd.split(',')] if args.nd else None
+    summaries = sweep(tables, group, nds, args.trials, args.workers, args.seed, party,
+                      args.party_size, args.max_rounds)
+    print(format_sweep(group, summaries))
@@ -1,30 +1,14 @@
-import fitz
-import sys
+import instrumentation
+from extract_sections import extract_sections, parse_args
 
-PDF_PATH = r"C:/Users/welde/Dev/Projetos/rpg-cousins/src/data/T20 - Livro Básico.pdf"
-OUTPUT_PATH = r"C:/Users/welde/Dev/Projetos/rpg-cousins/temp_races_text_part2.txt"
-
-def extract_races_2():
+# Mantido por compatibilidade; a extração real fica em extract_sections.py
+def extract_races_2(workers=1):
     try:
-        doc = fitz.open(PDF_PATH)
-        start_page = 30 # Page 31
-        end_page = 37   # Page 38
-        
-        print(f"Starting extraction at page {start_page + 1}")
-        
-        text = ""
-        for i in range(start_page, min(end_page, len(doc))):
-            page_text = doc[i].get_text()
-            text += f"\n--- Page {i+1} ---\n"
-            text += page_text
-            
-        with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-            f.write(text)
-            
-        print(f"Extracted content to {OUTPUT_PATH}")
-        
+        extract_sections(["races_part2"], workers=workers)
     except Exception as e:
         print(f"Error: {e}")
 
 if __name__ == "__main__":
-    extract_races_2()
+    args = parse_args(with_sections=False)
+    instrumentation.start(args.profile)
+    extract_races_2(args.workers)
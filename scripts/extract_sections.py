@@ -0,0 +1,118 @@
+import os
+import argparse
+
+import instrumentation
+from instrumentation import add_profile_argument, count
+from pdf_index import PageIndex
+from pdf_text_cache import BASE_DIR, PDF_PATH, WRITE_BUFFER_SIZE, PageTextCache, page_block
+
+# Manifesto das seções extraídas do Livro Básico.
+# Cada seção define um intervalo fixo (start/end, índices 0-based, end exclusivo)
+# ou uma âncora de título (anchor + search_from + num_pages) resolvida pelo índice do PDF.
+SECTIONS = [
+    {
+        "name": "races",
+        "start": 14,  # Page 15
+        "end": 36,    # Page 37 (exclusive of classes, hopefully)
+        "output": os.path.join(BASE_DIR, "temp_races_text.txt"),
+    },
+    {
+        "name": "races_part2",
+        "start": 30,  # Page 31
+        "end": 37,    # Page 38
+        "output": os.path.join(BASE_DIR, "temp_races_text_part2.txt"),
+    },
+    {
+        "name": "classes",
+        "start": 36,  # Page 37
+        "end": 96,    # 60 pages to cover all classes
+        "output": os.path.join(BASE_DIR, "temp_classes_text.txt"),
+    },
+    {
+        "name": "divinities",
+        "start": 95,  # Page 96 in book (approx)
+        "end": 118,   # Page 119 in book (approx)
+        "output": os.path.join(BASE_DIR, "temp_divinities_text.txt"),
+    },
+    {
+        "name": "powers",
+        "start": 119,  # Page 120
+        "end": 149,    # Page 150
+        "output": os.path.join(BASE_DIR, "temp_powers_text.txt"),
+    },
+]
+
+
+def resolve_range(section, cache, index_holder):
+    """Retorna (start, end) da seção, consultando o índice quando ela usa âncora"""
+    if "anchor" in section:
+        if index_holder.get("index") is None:
+            index_holder["index"] = PageIndex.from_cache(cache)
+        pages = index_holder["index"].pages_with(section["anchor"], section.get("search_from", 0))
+        if not pages:
+            raise ValueError(f"Âncora '{section['anchor']}' não encontrada para a seção {section['name']}")
+        start = pages[0]
+        end = start + section["num_pages"]
+    else:
+        start, end = section["start"], section["end"]
+    return start, min(end, len(cache))
+
+
+def parse_args(argv=None, with_sections=True):
+    parser = argparse.ArgumentParser(description="Extrai seções do Livro Básico para arquivos de texto")
+    if with_sections:
+        parser.add_argument("sections", nargs="*", help="Seções do manifesto (padrão: todas)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Número de processos para decodificar páginas ainda fora do cache")
+    add_profile_argument(parser)
+    return parser.parse_args(argv)
+
+
+def extract_sections(names=None, pdf_path=PDF_PATH, workers=1):
+    """
+    Extrai as seções pedidas (todas por padrão) em uma única passada:
+    cada página é decodificada uma vez e escrita em todos os arquivos que a incluem.
+    """
+    sections = [s for s in SECTIONS if names is None or s["name"] in names]
+    unknown = set(names or []) - {s["name"] for s in sections}
+    if unknown:
+        print(f"Error: unknown sections: {', '.join(sorted(unknown))}")
+        return
+
+    cache = PageTextCache(pdf_path, workers=workers)
+    index_holder = {}
+    ranges = []
+    for section in sections:
+        start, end = resolve_range(section, cache, index_holder)
+        print(f"[{section['name']}] Starting extraction at page {start + 1}")
+        ranges.append((section, start, end))
+
+    all_pages = sorted({i for _, start, end in ranges for i in range(start, end)})
+    # Cada página é escrita assim que sai do cache/decodificação; só o buffer limitado fica em memória
+    outputs = {
+        s["name"]: open(s["output"], "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+        for s, _, _ in ranges
+    }
+    try:
+        for i, page_text in cache.iter_pages(all_pages):
+            block = page_block(i, page_text)
+            for section, start, end in ranges:
+                if start <= i < end:
+                    outputs[section["name"]].write(block)
+                    count("chars.written", len(block))
+    finally:
+        for out in outputs.values():
+            out.close()
+        cache.close()
+
+    for section, _, _ in ranges:
+        print(f"Extracted content to {section['output']}")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    instrumentation.start(args.profile)
+    try:
+        extract_sections(args.sections or None, workers=args.workers)
+    except Exception as e:
+        print(f"Error: {e}")
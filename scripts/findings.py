@@ -0,0 +1,49 @@
+import json
+import os
+
+# Ordem crescente de gravidade
+SEVERITIES = ["info", "warning", "error"]
+
+EXIT_OK = 0
+EXIT_FINDINGS = 1
+EXIT_ERRORS = 2
+
+
+class FindingWriter:
+    """
+    Grava achados em NDJSON (um objeto JSON por linha), à medida que são produzidos.
+    Cada linha tem: tool, severity, code, message e campos extras (file, line, item...).
+    """
+
+    def __init__(self, path, tool):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.tool = tool
+        self.f = open(path, 'w', encoding='utf-8', buffering=1)
+        self.counts = {s: 0 for s in SEVERITIES}
+
+    def emit(self, severity, code, message, **fields):
+        record = {"tool": self.tool, "severity": severity, "code": code, "message": message}
+        record.update({k: v for k, v in fields.items() if v is not None})
+        self.f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.counts[severity] += 1
+
+    def exit_code(self):
+        """0 sem achados relevantes, 1 se há avisos, 2 se há erros"""
+        if self.counts["error"]:
+            return EXIT_ERRORS
+        if self.counts["warning"]:
+            return EXIT_FINDINGS
+        return EXIT_OK
+
+    def summary(self):
+        return ", ".join(f"{self.counts[s]} {s}" for s in SEVERITIES)
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,155 @@
+import time
+import threading
+import http.client
+import urllib.parse
+from contextlib import contextmanager
+
+from instrumentation import count
+
+USER_AGENT = 'Mozilla/5.0'
+DEFAULT_TIMEOUT = 30
+MAX_REDIRECTS = 5
+# Conexões ociosas guardadas por host
+MAX_IDLE_PER_HOST = 8
+
+
+class HTTPStatusError(Exception):
+    """Resposta HTTP >= 400 (equivalente ao urllib.error.HTTPError usado antes)"""
+
+    def __init__(self, code, reason, url, headers=None):
+        super().__init__(f"HTTP {code} {reason} ({url})")
+        self.code = code
+        self.reason = reason
+        self.url = url
+        self.headers = headers or {}
+
+
+class TokenBucket:
+    """
+    Orçamento de requisições: `rate` a cada `per` segundos, começando cheio.
+    acquire() bloqueia a thread até haver uma ficha, em vez de um sleep fixo por requisição.
+    """
+
+    def __init__(self, rate, per=60.0):
+        self.rate = float(rate)
+        self.per = float(per)
+        self.tokens = self.rate
+        self.updated = time.monotonic()
+        self.cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+        self.updated = now
+
+    def acquire(self):
+        with self.cond:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                self.cond.wait(timeout=(1 - self.tokens) * self.per / self.rate)
+
+
+class ConnectionPool:
+    """
+    Conexões HTTP/1.1 keep-alive reaproveitadas por host (esquema, host, porta), seguras
+    para várias threads: cada requisição pega uma conexão ociosa do host ou abre uma nova,
+    e a devolve ao terminar de ler a resposta.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_idle_per_host=MAX_IDLE_PER_HOST):
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self.idle = {}
+        self.lock = threading.Lock()
+
+    def _connect(self, key):
+        scheme, host, port = key
+        count("http.connections_opened")
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _checkout(self, key):
+        with self.lock:
+            conns = self.idle.get(key)
+            if conns:
+                return conns.pop(), True
+        return self._connect(key), False
+
+    def _checkin(self, key, conn):
+        with self.lock:
+            conns = self.idle.setdefault(key, [])
+            if len(conns) < self.max_idle_per_host:
+                conns.append(conn)
+                return
+        conn.close()
+
+    def _send(self, method, url, headers):
+        """Envia a requisição; uma conexão reaproveitada que o servidor já fechou é refeita uma vez"""
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        all_headers = {"User-Agent": USER_AGENT}
+        all_headers.update(headers or {})
+        while True:
+            conn, reused = self._checkout(key)
+            try:
+                conn.request(method, path, headers=all_headers)
+                count("http.requests")
+                return key, conn, conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if not reused:
+                    raise
+            except Exception:
+                conn.close()
+                raise
+
+    @contextmanager
+    def open(self, url, headers=None, method="GET"):
+        """
+        Abre `url` seguindo redirecionamentos e devolve o http.client.HTTPResponse para leitura
+        (inteira ou em blocos). Levanta HTTPStatusError para status >= 400.
+        A conexão volta ao pool se a resposta foi lida até o fim.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            key, conn, resp = self._send(method, url, headers)
+            if resp.status in (301, 302, 303, 307, 308) and resp.getheader("Location"):
+                resp.read()
+                self._release(key, conn, resp)
+                url = urllib.parse.urljoin(url, resp.getheader("Location"))
+                continue
+            if resp.status >= 400:
+                resp.read()
+                self._release(key, conn, resp)
+                raise HTTPStatusError(resp.status, resp.reason, url, dict(resp.getheaders()))
+            try:
+                yield resp
+            except BaseException:
+                # Leitura interrompida: a conexão pode ter dados pendentes, não volta ao pool
+                conn.close()
+                raise
+            self._release(key, conn, resp)
+            return
+        raise HTTPStatusError(310, "Too many redirects", url)
+
+    def _release(self, key, conn, resp):
+        if resp.isclosed() and not resp.will_close:
+            self._checkin(key, conn)
+        else:
+            conn.close()
+
+    def get(self, url, headers=None):
+        """GET lendo o corpo inteiro (respostas pequenas, ex: JSON de busca)"""
+        with self.open(url, headers) as resp:
+            return resp.read()
+
+    def close(self):
+        with self.lock:
+            conns = [c for cs in self.idle.values() for c in cs]
+            self.idle.clear()
+        for conn in conns:
+            conn.close()
@@ -0,0 +1,131 @@
+import os
+import sys
+import time
+import atexit
+import pstats
+import cProfile
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+# Arquivo padrão de --profile sem argumento (no diretório atual)
+DEFAULT_PROFILE_PATH = "profile.prof"
+
+
+class Metrics:
+    """
+    Tempos por etapa e contadores compartilhados por todos os módulos de scripts/.
+    Seguro para threads (o auditor chama a API em um thread pool). Trabalho feito em
+    outros processos deve ser contado no processo principal, ao receber o resultado.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timers = {}    # etapa -> [segundos, chamadas]
+        self.counters = {}  # nome -> valor
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        with self.lock:
+            entry = self.timers.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        """Tabela de texto com as etapas (em ordem de primeira ocorrência) e os contadores"""
+        total = time.perf_counter() - self.started
+        with self.lock:
+            timers = list(self.timers.items())
+            counters = list(self.counters.items())
+        width = max([len(n) for n, _ in timers + counters] + [len("Etapa")])
+        lines = [f"{'Etapa':<{width}}  {'Tempo':>9}  {'%':>5}  {'Chamadas':>8}"]
+        for name, (seconds, calls) in timers:
+            share = seconds / total if total else 0
+            lines.append(f"{name:<{width}}  {seconds:>8.3f}s  {share:>5.0%}  {calls:>8}")
+        lines.append(f"{'total':<{width}}  {total:>8.3f}s")
+        if counters:
+            lines.append("")
+            lines.append(f"{'Contador':<{width}}  {'Valor':>9}")
+            for name, value in counters:
+                lines.append(f"{name:<{width}}  {value:>9}")
+        return "\n".join(lines)
+
+
+metrics = Metrics()
+stage = metrics.stage
+count = metrics.count
+
+
+def timed(name):
+    """Decorador: mede cada chamada da função como a etapa `name`"""
+    def wrap(func):
+        @wraps(func)
+        def inner(*args, **kwargs):
+            with metrics.stage(name):
+                return func(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def add_profile_argument(parser):
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE_PATH, default=None, metavar="ARQUIVO",
+                        help="Grava um perfil da execução (cProfile; .html usa o pyinstrument se instalado)")
+
+
+def _start_profiler(path):
+    if path.endswith(".html"):
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("Aviso: pyinstrument não instalado, usando cProfile", file=sys.stderr)
+            path = os.path.splitext(path)[0] + ".prof"
+        else:
+            profiler = Profiler()
+            profiler.start()
+
+            def stop():
+                profiler.stop()
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(profiler.output_html())
+                print(f"Perfil salvo em: {path}", file=sys.stderr)
+            return stop
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    def stop():
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"\nPerfil salvo em: {path} (funções mais caras):", file=sys.stderr)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(15)
+    return stop
+
+
+def start(profile_path=None, summary=True):
+    """
+    Ativa o relatório ao final da execução (e o profiler, se pedido).
+    Chamado no __main__ de cada ferramenta; importar os módulos não imprime nada.
+    """
+    metrics.started = time.perf_counter()
+    stop_profiler = _start_profiler(profile_path) if profile_path else None
+
+    def report():
+        if stop_profiler:
+            stop_profiler()
+        if summary:
+            print("\n--- Tempo por etapa ---", file=sys.stderr)
+            print(metrics.summary(), file=sys.stderr)
+
+    atexit.register(report)
@@ -1,20 +1,46 @@
 import os
 import re
 import unicodedata
-import time
 import json
 import random
-import urllib.request
+import hashlib
+import threading
 import urllib.parse
-import urllib.error
+from queue import Queue
+
+import instrumentation
+from asset_postprocess import add_process_arguments, print_stats, process_assets, process_options
+from asset_store import AssetManifest, stream_download
+from http_pool import ConnectionPool, HTTPStatusError, TokenBucket
+from instrumentation import count, stage
+from search_cache import DEFAULT_TTL, SearchCache
 
 # CONFIGURATION
 # Get your API key from https://pixabay.com/api/docs/
 PIXABAY_API_KEY = os.getenv('PIXABAY_API_KEY', 'YOUR_PIXABAY_API_KEY_HERE')
-BASE_URL = "https://pixabay.com/api/"
+# Endpoints configuráveis para testar contra um stub local (asset_stub_server.py)
+BASE_URL = os.getenv('PIXABAY_API_URL', "https://pixabay.com/api/")
 # Fallback support for Unsplash if needed
 UNSPLASH_ACCESS_KEY = os.getenv('UNSPLASH_ACCESS_KEY', 'YOUR_UNSPLASH_ACCESS_KEY_HERE')
+UNSPLASH_URL = os.getenv('UNSPLASH_API_URL', "https://api.unsplash.com/search/photos")
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'public', 'assets', 'items')
+# Arquivos de dados com os itens do mercado
+ITEM_SOURCES = [
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'data', 'equipamentos.ts'),
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'data', 'equipamentos-gerais.ts'),
+]
+
+# Orçamentos de busca das APIs (token bucket), no lugar dos sleeps fixos após cada download
+PIXABAY_RPM = 100      # Pixabay: 100 requisições a cada 60s
+UNSPLASH_RPH = 50      # Unsplash (modo demo): 50 requisições por hora
+# Buscas e downloads rodam em filas separadas e limitadas, cada uma com suas threads
+SEARCH_WORKERS = 4
+DOWNLOAD_WORKERS = 8
+QUEUE_SIZE = 32
+# Páginas de resultados sorteadas por busca (3 resultados por página)
+SEARCH_PAGES = 3
+# O manifesto de downloads é gravado a cada tantas imagens (e no final)
+MANIFEST_SAVE_EVERY = 20
 
 # Mappings for better search queries (Shortened for Pixabay 100char limit)
 CATEGORY_KEYWORDS = {
@@ -28,19 +54,6 @@ CATEGORY_KEYWORDS = {
     'Ferramenta': 'fantasy tool illustration'
 }
 
-def remove_background_placeholder(input_data):
-    """
-    STUB: Placeholder for rembg background removal.
-    To use this, install 'rembg' and 'pillow':
-    pip install rembg pillow
-    
-    Example implementation:
-    from rembg import remove
-    return remove(input_data)
-    """
-    return input_data
-
-
 ITEM_TRANSLATIONS = {
     # WEAPONS
     'adaga': 'dagger',
@@ -273,149 +286,311 @@ def extract_items_from_file(filepath):
         
     return items
 
-def search_and_download_image(item, existing_files):
-    filename = sanitize_filename(item['name'])
-    
-    if filename in existing_files:
-        # Check happens in main loop now to provide better summary
-        return
+def load_items(sources=ITEM_SOURCES, verbose=False):
+    """Itens ({name, group}) de todos os arquivos de dados do mercado"""
+    all_items = []
+    for filepath in sources:
+        if verbose:
+            print(f"Scanning {os.path.basename(filepath)}...")
+        with stage("scan.items"):
+            items = extract_items_from_file(filepath)
+        all_items.extend(items)
+        if verbose:
+            print(f"  Found {len(items)} items.")
+    return all_items
 
-    print(f"Processing: {item['name']}...")
-    
-    # Determine search query
+def build_query(item):
+    """Monta a busca em inglês do item (limite de 100 caracteres do parâmetro 'q' do Pixabay)"""
     english_name = get_english_term(item['name'])
     base_keyword = CATEGORY_KEYWORDS.get(item['group'], 'fantasy rpg item')
     
-    # 100 character limit for Pixabay 'q' parameter.
     # Format: "{name} {category} digital art"
     query = f"{english_name} {base_keyword} digital art"
     
     # Ensure it's under 100 chars
     if len(query) > 95:
         query = query[:95]
-    
-    print(f"  -> Query: '{query}'")
-    
-    # Check key format
-    if PIXABAY_API_KEY == 'YOUR_PIXABAY_API_KEY_HERE' and UNSPLASH_ACCESS_KEY == 'YOUR_UNSPLASH_ACCESS_KEY_HERE':
-        print(f"  [DRY RUN] Would search Pixabay for: '{query}'")
-        print("  ! Please set PIXABAY_API_KEY env var to enable downloads.")
-        return
+    return query
 
-    try:
-        # Search Pixabay (Primary)
+def search_pixabay(pool, budget, query, page, base_url=BASE_URL):
+    """URLs dos resultados de uma página da busca no Pixabay"""
+    params = urllib.parse.urlencode({
+        'key': PIXABAY_API_KEY,
+        'q': query,
+        'image_type': 'illustration',
+        'category': 'backgrounds',
+        'per_page': 3,
+        'page': page,
+        'safesearch': 'true'
+    })
+    budget.acquire()
+    with stage("http.search"):
+        data = json.loads(pool.get(f"{base_url}?{params}").decode())
+    count("search.requests")
+    return [hit['webformatURL'] for hit in data['hits']]
+
+def search_unsplash(pool, budget, query, page, base_url=UNSPLASH_URL):
+    """URLs dos resultados de uma página da busca no Unsplash"""
+    params = urllib.parse.urlencode({
+        'query': query,
+        'per_page': 3,
+        'page': page,
+        'client_id': UNSPLASH_ACCESS_KEY
+    })
+    budget.acquire()
+    with stage("http.search"):
+        data = json.loads(pool.get(f"{base_url}?{params}").decode())
+    count("search.requests")
+    return [result['urls']['small'] for result in data['results']]
+
+def print_http_error(name, e):
+    if e.code == 401:
+        print(f"  [{name}] API Error: 401 - Unauthorized. Your Unsplash Access Key is invalid or expired.")
+    elif e.code == 403:
+        print(f"  [{name}] API Error: 403 - Forbidden. Rate limit exceeded or access denied.")
+    else:
+        print(f"  [{name}] API Error: {e.code} - {e.reason}")
+
+class DownloadPipeline:
+    """
+    Busca e baixa as imagens em duas etapas concorrentes ligadas por filas limitadas:
+    search_workers threads consultam Pixabay (com fallback para o Unsplash) respeitando
+    o orçamento de cada API, e download_workers threads baixam as imagens encontradas.
+    Todas as requisições reaproveitam conexões keep-alive por host (ConnectionPool).
+
+    Itens com a mesma busca (ex: 'Armadura Completo' e 'Armadura Completa') compartilham
+    uma única consulta, e os resultados ficam em cache (SearchCache) por `search_ttl` segundos.
+    Sem `seed`, cada busca nova usa uma página aleatória e o item fica com o primeiro resultado;
+    com `seed`, a página e a imagem escolhida para cada item são derivadas da semente, então
+    uma nova execução escolhe as mesmas imagens e não refaz buscas que já estão no cache.
+    """
+
+    def __init__(self, manifest, output_dir=OUTPUT_DIR, search_workers=SEARCH_WORKERS,
+                 download_workers=DOWNLOAD_WORKERS, queue_size=QUEUE_SIZE,
+                 pixabay_url=BASE_URL, unsplash_url=UNSPLASH_URL,
+                 pixabay_rpm=PIXABAY_RPM, unsplash_rph=UNSPLASH_RPH,
+                 seed=None, search_ttl=DEFAULT_TTL):
+        self.manifest = manifest
+        self.output_dir = output_dir
+        self.search_workers = search_workers
+        self.download_workers = download_workers
+        self.pixabay_url = pixabay_url
+        self.unsplash_url = unsplash_url
+        self.seed = seed
+        self.cache = SearchCache(ttl=search_ttl)
+        self.pool = ConnectionPool()
+        self.pixabay_budget = TokenBucket(pixabay_rpm, per=60)
+        self.unsplash_budget = TokenBucket(unsplash_rph, per=3600)
+        self.search_queue = Queue(maxsize=queue_size)
+        self.download_queue = Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.stats = {"downloaded": 0, "not_found": 0, "failed": 0}
+
+    def _tally(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _seeded(self, *parts):
+        """Inteiro determinístico derivado da semente e de `parts`"""
+        key = ":".join(str(p) for p in (self.seed,) + parts)
+        return int.from_bytes(hashlib.sha256(key.encode('utf-8')).digest()[:8], 'big')
+
+    def search(self, source, query):
+        """URLs de uma página de resultados de `source`, do cache quando possível"""
+        page = None if self.seed is None else self._seeded(source, query) % SEARCH_PAGES + 1
+        urls = self.cache.get(source, query, page)
+        if urls is not None:
+            count("search.cache_hits")
+            return urls
+        if page is None:
+            page = random.randint(1, SEARCH_PAGES)
+        if source == "Pixabay":
+            urls = search_pixabay(self.pool, self.pixabay_budget, query, page, self.pixabay_url)
+        else:
+            urls = search_unsplash(self.pool, self.unsplash_budget, query, page, self.unsplash_url)
+        self.cache.put(source, query, page, urls)
+        return urls
+
+    def find_images(self, query):
+        """Devolve (urls, origem) da primeira busca com resultado, ou ([], None)"""
         if PIXABAY_API_KEY != 'YOUR_PIXABAY_API_KEY_HERE':
-            params = urllib.parse.urlencode({
-                'key': PIXABAY_API_KEY,
-                'q': query,
-                'image_type': 'illustration',
-                'category': 'backgrounds',
-                'per_page': 3,
-                'page': random.randint(1, 3),
-                'safesearch': 'true'
-            })
-            
-            req = urllib.request.Request(f"{BASE_URL}?{params}", headers={'User-Agent': 'Mozilla/5.0'})
-            with urllib.request.urlopen(req) as response:
-                data = json.loads(response.read().decode())
-                
-                if data['hits']:
-                    # Take first result
-                    image_url = data['hits'][0]['webformatURL']
-                    print(f"  Found on Pixabay: {image_url}")
-                    
-                    # Download
-                    img_req = urllib.request.Request(image_url, headers={'User-Agent': 'Mozilla/5.0'})
-                    with urllib.request.urlopen(img_req) as img_resp:
-                        content = img_resp.read()
-                        
-                        # Apply background removal stub if it were active
-                        # content = remove_background_placeholder(content)
-                        
-                        output_path = os.path.join(OUTPUT_DIR, filename)
-                        with open(output_path, 'wb') as f:
-                            f.write(content)
-                        print(f"  Downloaded: {filename}")
-                        time.sleep(1) # Pixabay is more generous but still good to be nice
-                        return
-                    
+            urls = self.search("Pixabay", query)
+            if urls:
+                return urls, "Pixabay"
         # Fallback to Unsplash if Pixabay fails or no key
         if UNSPLASH_ACCESS_KEY != 'YOUR_UNSPLASH_ACCESS_KEY_HERE':
-            print("  Attempting Unsplash fallback...")
-            # (Keep old Unsplash logic if key exists)
-            unsplash_url = "https://api.unsplash.com/search/photos"
-            params = urllib.parse.urlencode({
-                'query': query,
-                'per_page': 3,
-                'page': random.randint(1, 3),
-                'client_id': UNSPLASH_ACCESS_KEY
-            })
-            req = urllib.request.Request(f"{unsplash_url}?{params}")
-            with urllib.request.urlopen(req) as response:
-                data = json.loads(response.read().decode())
-                if data['results']:
-                    image_url = data['results'][0]['urls']['small']
-                    img_req = urllib.request.Request(image_url)
-                    with urllib.request.urlopen(img_req) as img_resp:
-                        content = img_resp.read()
-                        with open(os.path.join(OUTPUT_DIR, filename), 'wb') as f:
-                            f.write(content)
-                        print(f"  Downloaded from Unsplash: {filename}")
-                        time.sleep(2)
-                        return
-            
-    except urllib.error.HTTPError as e:
-        if e.code == 401:
-            print(f"  API Error: 401 - Unauthorized. Your Unsplash Access Key is invalid or expired.")
-        elif e.code == 403:
-            print(f"  API Error: 403 - Forbidden. Rate limit exceeded or access denied.")
-        else:
-            print(f"  API Error: {e.code} - {e.reason}")
-            
-    except Exception as e:
-        print(f"  Error: {str(e)}")
+            urls = self.search("Unsplash", query)
+            if urls:
+                return urls, "Unsplash"
+        return [], None
+
+    def pick(self, urls, filename):
+        """Imagem do item entre os resultados: a primeira, ou uma escolhida pela semente"""
+        if self.seed is None:
+            return urls[0]
+        return urls[self._seeded(filename) % len(urls)]
+
+    def download(self, url, filename):
+        # Em blocos para um .part, verificado e renomeado atomicamente (ver asset_store)
+        size, sha256 = stream_download(self.pool, url, os.path.join(self.output_dir, filename))
+        self.manifest.record(filename, url, size, sha256)
+        with self.lock:
+            save = self.stats["downloaded"] % MANIFEST_SAVE_EVERY == MANIFEST_SAVE_EVERY - 1
+        if save:
+            self.manifest.save()
+
+    def _search_worker(self):
+        while True:
+            job = self.search_queue.get()
+            if job is None:
+                return
+            query, items = job
+            for item in items:
+                print(f"Processing: {item['name']} -> Query: '{query}'")
+            try:
+                urls, source = self.find_images(query)
+            except HTTPStatusError as e:
+                for item in items:
+                    print_http_error(item['name'], e)
+                    self._tally("failed")
+                continue
+            except Exception as e:
+                for item in items:
+                    print(f"  [{item['name']}] Error: {str(e)}")
+                    self._tally("failed")
+                continue
+            for item in items:
+                if urls:
+                    self.download_queue.put((item, self.pick(urls, sanitize_filename(item['name'])), source))
+                else:
+                    print(f"  [{item['name']}] Nenhuma imagem encontrada")
+                    self._tally("not_found")
+
+    def _download_worker(self):
+        while True:
+            job = self.download_queue.get()
+            if job is None:
+                return
+            item, url, source = job
+            filename = sanitize_filename(item['name'])
+            try:
+                self.download(url, filename)
+                print(f"  Downloaded from {source}: {filename}")
+                count("images.downloaded")
+                self._tally("downloaded")
+            except HTTPStatusError as e:
+                print_http_error(item['name'], e)
+                self._tally("failed")
+            except Exception as e:
+                print(f"  [{item['name']}] Error: {str(e)}")
+                self._tally("failed")
+
+    def run(self, items):
+        # Buscas vencidas nunca mais seriam lidas; sem isso o arquivo do cache só cresce
+        count("search.purged", self.cache.purge())
+        searchers = [threading.Thread(target=self._search_worker, daemon=True)
+                     for _ in range(self.search_workers)]
+        downloaders = [threading.Thread(target=self._download_worker, daemon=True)
+                       for _ in range(self.download_workers)]
+        for t in searchers + downloaders:
+            t.start()
+        try:
+            # Uma busca por texto de busca distinto, servindo todos os itens que o compartilham
+            by_query = {}
+            for item in items:
+                by_query.setdefault(build_query(item), []).append(item)
+            count("search.deduped", len(items) - len(by_query))
+            # put() bloqueia quando a fila está cheia, então só QUEUE_SIZE buscas esperam por vez
+            for job in by_query.items():
+                self.search_queue.put(job)
+            for _ in searchers:
+                self.search_queue.put(None)
+            for t in searchers:
+                t.join()
+            for _ in downloaders:
+                self.download_queue.put(None)
+            for t in downloaders:
+                t.join()
+        finally:
+            self.pool.close()
+            self.cache.close()
+            self.manifest.save()
+        return self.stats
 
-def main():
+def main(output_dir=OUTPUT_DIR, verify=False, process=None, **pipeline_options):
     print("--- Market Asset Downloader ---")
     print(f"Using Key: {UNSPLASH_ACCESS_KEY[:4]}...{UNSPLASH_ACCESS_KEY[-4:] if len(UNSPLASH_ACCESS_KEY) > 8 else ''}")
     
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-        print(f"Created directory: {OUTPUT_DIR}")
-
-    # Paths to data files
-    base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    files_to_scan = [
-        os.path.join(base_path, 'src', 'data', 'equipamentos.ts'),
-        os.path.join(base_path, 'src', 'data', 'equipamentos-gerais.ts')
-    ]
-    
-    all_items = []
-    for filepath in files_to_scan:
-        print(f"Scanning {os.path.basename(filepath)}...")
-        items = extract_items_from_file(filepath)
-        all_items.extend(items)
-        print(f"  Found {len(items)} items.")
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+        print(f"Created directory: {output_dir}")
+
+    all_items = load_items(verbose=True)
         
     print(f"Total items found in source: {len(all_items)}")
     
-    # Get existing files
-    existing_files = set(os.listdir(OUTPUT_DIR))
+    # Só contam como baixados os arquivos completos segundo o manifesto
+    # (um download interrompido fica como .part e é retomado)
+    manifest = AssetManifest(output_dir)
     
     missing_items = []
-    for item in all_items:
-        filename = sanitize_filename(item['name'])
-        if filename not in existing_files:
+    queued = set()
+    with stage("scan.existing"):
+        for item in all_items:
+            filename = sanitize_filename(item['name'])
+            # Itens diferentes com o mesmo nome de arquivo são baixados uma vez só
+            if filename in queued or manifest.is_complete(filename, verify_hash=verify):
+                continue
             missing_items.append(item)
+            queued.add(filename)
+    manifest.save()
             
     print(f"Items already downloaded: {len(all_items) - len(missing_items)}")
     print(f"Items missing (to download): {len(missing_items)}")
     print("-" * 30)
-    
-    for item in missing_items:
-        search_and_download_image(item, existing_files)
-        
-    print("\nDone!")
+
+    # Check key format
+    if PIXABAY_API_KEY == 'YOUR_PIXABAY_API_KEY_HERE' and UNSPLASH_ACCESS_KEY == 'YOUR_UNSPLASH_ACCESS_KEY_HERE':
+        for item in missing_items:
+            print(f"  [DRY RUN] Would search Pixabay for: '{build_query(item)}'")
+        print("  ! Please set PIXABAY_API_KEY env var to enable downloads.")
+        return
+
+    pipeline = DownloadPipeline(manifest, output_dir, **pipeline_options)
+    with stage("pipeline"):
+        stats = pipeline.run(missing_items)
+    print(f"\nDone! {stats['downloaded']} baixadas, {stats['not_found']} sem resultado, {stats['failed']} com erro.")
+
+    # Recorte, WebP e miniaturas (ver asset_postprocess.py); process=None pula a etapa
+    if process is not None:
+        print("Pós-processando imagens...")
+        print_stats(process_assets(manifest, **process))
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Baixa imagens para os itens do mercado")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--verify", action="store_true",
+                        help="Confere o hash SHA-256 das imagens já baixadas (senão só o tamanho)")
+    parser.add_argument("--search-workers", type=int, default=SEARCH_WORKERS, help="Threads de busca")
+    parser.add_argument("--download-workers", type=int, default=DOWNLOAD_WORKERS, help="Threads de download")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="Tamanho máximo de cada fila")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Escolha de páginas e imagens reproduzível (reexecuções usam as buscas em cache)")
+    parser.add_argument("--search-ttl", type=float, default=DEFAULT_TTL / 86400,
+                        help="Validade do cache de buscas, em dias (0 = sempre buscar de novo)")
+    parser.add_argument("--pixabay-url", default=BASE_URL, help="Endpoint de busca do Pixabay")
+    parser.add_argument("--unsplash-url", default=UNSPLASH_URL, help="Endpoint de busca do Unsplash")
+    parser.add_argument("--pixabay-rpm", type=float, default=PIXABAY_RPM, help="Buscas por minuto no Pixabay")
+    parser.add_argument("--unsplash-rph", type=float, default=UNSPLASH_RPH, help="Buscas por hora no Unsplash")
+    parser.add_argument("--no-process", action="store_true",
+                        help="Não converte as imagens baixadas (mantém os bytes originais)")
+    add_process_arguments(parser)
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.start(args.profile)
+    process = None if args.no_process else dict(process_options(args), workers=args.process_workers)
+    main(args.output_dir, args.verify, process, search_workers=args.search_workers, download_workers=args.download_workers,
+         queue_size=args.queue_size, pixabay_url=args.pixabay_url, unsplash_url=args.unsplash_url,
+         pixabay_rpm=args.pixabay_rpm, unsplash_rph=args.unsplash_rph,
+         seed=args.seed, search_ttl=args.search_ttl * 86400)
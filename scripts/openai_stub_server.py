@@ -0,0 +1,95 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Servidor local que imita o endpoint /v1/chat/completions da OpenAI.
+# Uso: python openai_stub_server.py --port 8089 --fail-rate 0.2
+#      python pdf_auditor.py --base-url http://127.0.0.1:8089/v1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    fail_rate = 0.0
+    latency = 0.0
+    requests_seen = 0
+    # O ThreadingHTTPServer atende cada requisição em uma thread
+    requests_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        with StubHandler.requests_lock:
+            StubHandler.requests_seen += 1
+            request_id = StubHandler.requests_seen
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if random.random() < self.fail_rate:
+            status = random.choice([429, 500, 503])
+            self._send_json(status, {"error": {"message": f"stub failure {status}", "type": "stub"}},
+                            headers={"retry-after": "0.1"} if status == 429 else None)
+            return
+
+        user_prompt = payload.get("messages", [{}])[-1].get("content", "")
+        file_m = re.search(r"ARQUIVO: (.+)", user_prompt)
+        item_m = re.search(r"ITEM: (.+)", user_prompt)
+        content = (
+            f"{file_m.group(1) if file_m else '?'} -> {item_m.group(1) if item_m else '?'}"
+            " -> OK -> OK -> stub"
+        )
+        prompt_tokens = sum(len(m.get("content", "")) for m in payload.get("messages", [])) // 4
+        self._send_json(200, {
+            "id": f"chatcmpl-stub-{request_id}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4,
+            },
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub local do endpoint chat completions da OpenAI")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fração de respostas 429/5xx")
+    parser.add_argument("--latency", type=float, default=0.0, help="Atraso por resposta (segundos)")
+    args = parser.parse_args()
+
+    StubHandler.fail_rate = args.fail_rate
+    StubHandler.latency = args.latency
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    print(f"Stub da OpenAI ouvindo em http://127.0.0.1:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
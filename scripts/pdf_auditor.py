@@ -1,53 +1,85 @@
 import os
 import re
-import fitz
 from openai import OpenAI
 import json
 import glob
+import hashlib
+import time
 
-PDF_PATH = r"C:/Users/welde/Dev/Projetos/rpg-cousins/src/data/T20 - Livro Básico.pdf"
-DATA_DIR = r"C:/Users/welde/Dev/Projetos/rpg-cousins/src/data"
-REPORT_PATH = r"C:/Users/welde/Dev/Projetos/rpg-cousins/AUDIT_REPORT.md"
+from audit_cache import DEFAULT_BASE_URL, DEFAULT_MAX_BYTES, ResponseCache, response_key
+from audit_engine import AuditEngine
+from findings import FindingWriter
+from instrumentation import add_profile_argument, count, metrics, stage, start
+from pdf_index import PageIndex, fold
+from pdf_text_cache import BASE_DIR, PageTextCache
+from spell_audit import align_spells, load_spell_records, pack_spell_batches, parse_result_row, split_batch_result
+from ts_scanner import drop_properties, extract_default_object
+
+DATA_DIR = os.path.join(BASE_DIR, 'src', 'data')
+PDF_PATH = os.path.join(DATA_DIR, 'T20 - Livro Básico.pdf')
+REPORT_PATH = os.path.join(BASE_DIR, 'AUDIT_REPORT.md')
+# Um achado por linha (NDJSON), para CI e outras ferramentas
+FINDINGS_PATH = os.path.join(BASE_DIR, 'AUDIT_REPORT.ndjson')
+# Hash e último resultado de cada arquivo auditado, usado pelo modo --incremental
+MANIFEST_PATH = os.path.join(BASE_DIR, '.cache', 'audit_manifest.json')
+
+MODEL = "gpt-4o" # Ou gpt-3.5-turbo se preferir
+TEMPERATURE = 0
+
+# Campos de raças e classes que não são regra: ambientação, pesos usados pelo gerador
+# de fichas e a origem (source) repetida em cada sheetAction/sheetBonus.
+# Ficam fora do código enviado ao modelo (a description das habilidades é mantida)
+NON_RULE_FIELDS = ("description", "appearance", "personality", "commonReligions",
+                   "faithProbability", "probDevoto", "attrPriority")
+NON_RULE_NESTED_FIELDS = ("source",)
+
+SYSTEM_PROMPT = (
+    "Você é um auditor especializado no sistema de RPG Tormenta 20. "
+    "Sua tarefa é comparar o texto extraído do manual oficial (PDF) com a implementação no código (TypeScript). "
+    "FOCO: Compare os bônus de atributos e habilidades. "
+    "REGRA DE OURO: Se houver diferença, verifique se a versão no código corresponde à Errata da Versão Jogo do Ano (JdA). "
+    "Se for apenas um erro de digitação ou valor desatualizado, sugira a correção. "
+    "Se no código estiver explicitamente citando bônus que não estão no PDF mas fazem sentido na JdA, considere correto mas mencione.\n"
+    "Responda EXCLUSIVAMENTE no formato tabular:\n"
+    "[ARQUIVO] -> [ITEM] -> [VALOR ATUAL] -> [VALOR SUGERIDO] -> [MOTIVO]"
+)
 
 class T20Auditor:
-    def __init__(self, pdf_path, openai_key=None):
-        if not os.path.exists(pdf_path):
-            raise FileNotFoundError(f"PDF não encontrado em: {pdf_path}")
-        self.doc = fitz.open(pdf_path)
+    def __init__(self, pdf_path, openai_key=None, workers=1, base_url=None, cache=None):
+        # O cache levanta FileNotFoundError se o PDF não existir
+        self.pages = PageTextCache(pdf_path, workers=workers)
+        # Índice de palavras construído uma vez; as buscas consultam o índice em vez de varrer páginas
+        self.index = PageIndex.from_cache(self.pages)
         self.openai_key = openai_key
-        self.client = OpenAI(api_key=openai_key) if openai_key else None
+        self.base_url = base_url
+        # As novas tentativas ficam a cargo do AuditEngine, por isso max_retries=0
+        self.client = OpenAI(api_key=openai_key, base_url=base_url, max_retries=0) if openai_key else None
+        # Cache opcional de respostas (ResponseCache); itens sem mudança não chamam a API
+        self.cache = cache
 
     def search_section(self, title, start_page=0, max_pages=10):
         """Busca o início de uma seção (ex: 'RAÇAS')"""
-        for i in range(start_page, len(self.doc)):
-            text = self.doc[i].get_text()
-            if title.upper() in text.upper():
-                return i
-        return start_page
+        pages = self.index.pages_with(title, start_page)
+        return pages[0] if pages else start_page
 
     def extract_text(self, pages_list):
         """Extrai o texto de uma lista de páginas"""
-        text = ""
-        for i in pages_list:
-            if 0 <= i < len(self.doc):
-                text += f"\n--- Page {i+1} ---\n"
-                text += self.doc[i].get_text()
-        return text
+        valid_pages = [i for i in pages_list if 0 <= i < len(self.pages)]
+        return "".join(self.pages.iter_page_blocks(valid_pages))
 
     def extract_item_text(self, item_name, start_page, num_pages=3):
         """Extrai o texto de um item específico (ex: 'Anão')"""
         found_page = -1
         # Aumentando o range de busca para 150 páginas para cobrir o livro todo se necessário
-        for i in range(start_page, min(start_page + 150, len(self.doc))):
-            text = self.doc[i].get_text()
-            # Busca o nome do item como um título ou destaque
-            # Usando regex para garantir que é a palavra inteira e evitar falsos positivos
-            if re.search(rf'\b{re.escape(item_name)}\b', text, re.IGNORECASE):
+        # O índice ignora acentos, então confirmamos o nome exato só nas páginas candidatas
+        pattern = re.compile(rf'\b{re.escape(item_name)}\b', re.IGNORECASE)
+        for i in self.index.pages_with(item_name, start_page, start_page + 150):
+            if pattern.search(self.pages.get_text(i)):
                 found_page = i
                 break
         
         if found_page != -1:
-            return self.extract_text(range(found_page, min(found_page + num_pages, len(self.doc))))
+            return self.extract_text(range(found_page, min(found_page + num_pages, len(self.pages))))
         return None
 
     def get_code_content(self, file_path, item_name):
@@ -56,53 +88,149 @@ class T20Auditor:
             return None
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
-            # Tenta encontrar a definição do objeto (ex: const ANAO: Race = { ... })
-            # Se não conseguir isolar perfeitamente, manda o arquivo todo (mais seguro)
-            return content
-
-    def audit(self, item_name, pdf_text, code_text, file_name):
-        if not self.client:
-            return f"ERRO: OpenAI API Key não configurada para {item_name}"
+            # Isola o objeto exportado (ex: const ANAO: Race = { ... } + export default ANAO)
+            # Se não conseguir isolar, manda o arquivo todo (mais seguro)
+            literal = extract_default_object(content)
+            if literal is None:
+                return content
+            return drop_properties(literal, top_level=NON_RULE_FIELDS, anywhere=NON_RULE_NESTED_FIELDS)
 
-        system_prompt = (
-            "Você é um auditor especializado no sistema de RPG Tormenta 20. "
-            "Sua tarefa é comparar o texto extraído do manual oficial (PDF) com a implementação no código (TypeScript). "
-            "FOCO: Compare os bônus de atributos e habilidades. "
-            "REGRA DE OURO: Se houver diferença, verifique se a versão no código corresponde à Errata da Versão Jogo do Ano (JdA). "
-            "Se for apenas um erro de digitação ou valor desatualizado, sugira a correção. "
-            "Se no código estiver explicitamente citando bônus que não estão no PDF mas fazem sentido na JdA, considere correto mas mencione.\n"
-            "Responda EXCLUSIVAMENTE no formato tabular:\n"
-            "[ARQUIVO] -> [ITEM] -> [VALOR ATUAL] -> [VALOR SUGERIDO] -> [MOTIVO]"
-        )
-
-        user_prompt = (
+    def build_user_prompt(self, item_name, pdf_text, code_text, file_name):
+        return (
             f"ARQUIVO: {file_name}\n"
             f"ITEM: {item_name}\n\n"
             f"--- TEXTO DO PDF ---\n{pdf_text}\n\n"
             f"--- CÓDIGO ATUAL ---\n{code_text}"
         )
 
+    def cached_response(self, item_name, pdf_text, code_text, file_name):
+        """Resposta já conhecida para este prompt, ou None"""
+        if not self.cache:
+            return None
+        user_prompt = self.build_user_prompt(item_name, pdf_text, code_text, file_name)
+        return self.cache.get(response_key(MODEL, SYSTEM_PROMPT, user_prompt, TEMPERATURE, self.base_url))
+
+    def request_audit(self, item_name, pdf_text, code_text, file_name):
+        """
+        Faz a chamada à API e devolve a resposta (sempre texto; uma resposta vazia vira ERRO).
+        Erros da API são propagados.
+        """
+        user_prompt = self.build_user_prompt(item_name, pdf_text, code_text, file_name)
+
+        response = self.client.chat.completions.create(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=TEMPERATURE
+        )
+        content = response.choices[0].message.content
+        if not content:
+            # Sem conteúdo (ex: recusa ou filtro): conta como erro e não entra no cache
+            return f"ERRO na API para {item_name}: resposta sem conteúdo"
+        if self.cache:
+            self.cache.put(response_key(MODEL, SYSTEM_PROMPT, user_prompt, TEMPERATURE, self.base_url), content)
+        return content
+
+    def audit(self, item_name, pdf_text, code_text, file_name):
+        cached = self.cached_response(item_name, pdf_text, code_text, file_name)
+        if cached is not None:
+            return cached
+        if not self.client:
+            return f"ERRO: OpenAI API Key não configurada para {item_name}"
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o", # Ou gpt-3.5-turbo se preferir
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0
-            )
-            return response.choices[0].message.content
+            return self.request_audit(item_name, pdf_text, code_text, file_name)
         except Exception as e:
             return f"ERRO na API para {item_name}: {str(e)}"
 
-def run_audit(api_key):
-    auditor = T20Auditor(PDF_PATH, api_key)
+def file_fingerprint(paths, context):
+    """Hash do conteúdo dos arquivos + contexto (hash do PDF, modelo e prompt)"""
+    digest = hashlib.sha256(context.encode('utf-8'))
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def load_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+def audit_job(item_name, pdf_text, code_text, fpath):
+    return {"item_name": item_name, "pdf_text": pdf_text, "code_text": code_text,
+            "file_name": os.path.basename(fpath)}
+
+def emit_result_findings(findings, key, result):
+    """
+    Converte um resultado do relatório em achados NDJSON:
+    AVISO -> info, ERRO -> error e cada linha "ARQUIVO -> ITEM -> ATUAL -> SUGERIDO -> MOTIVO"
+    com valores diferentes -> warning.
+    """
+    if result.startswith("AVISO"):
+        findings.emit("info", "AVISO", result, key=key)
+        return
+    if result.startswith("ERRO"):
+        findings.emit("error", "ERRO_API", result, key=key)
+        return
+    for line in result.splitlines():
+        cols = parse_result_row(line)
+        if cols is None:
+            continue
+        file_name, item, current, suggested, reason = cols
+        if fold(current) == fold(suggested):
+            continue
+        findings.emit("warning", "DIVERGENCIA", reason, key=key, file=file_name, item=item,
+                      current=current, suggested=suggested)
+
+def run_audit(api_key, workers=1, concurrency=4, rpm=60, tpm=30000, base_url=None,
+              use_cache=True, cache_max_bytes=DEFAULT_MAX_BYTES, incremental=False,
+              spell_batch_tokens=6000, findings_path=FINDINGS_PATH):
+    """Executa a auditoria completa e devolve o código de saída (0, 1 com divergências, 2 com erros)"""
+    prepare_started = time.perf_counter()
+    cache = ResponseCache(max_bytes=cache_max_bytes) if use_cache else None
+    auditor = T20Auditor(PDF_PATH, api_key, workers=workers, base_url=base_url, cache=cache)
+    engine = AuditEngine(auditor, concurrency=concurrency, rpm=rpm, tpm=tpm, system_prompt=SYSTEM_PROMPT)
     
-    report_lines = ["# RELATÓRIO DE AUDITORIA T20\n"]
+    # Primeiro coletamos os jobs (ou avisos) na ordem do relatório; as chamadas à API
+    # rodam depois em paralelo e cada seção é gravada assim que seu resultado fica pronto.
+    # Cada entrada é (chave no manifesto, fingerprint, job ou texto pronto); nos lotes de
+    # magias o lugar do fingerprint guarda as magias do lote (cada uma com chave e fingerprint)
+    entries = []
+
+    previous = load_manifest() if incremental else {}
+    manifest = {}
+    # Itens e magias cujo resultado anterior foi reaproveitado (só no modo incremental)
+    reused_count = 0
+    # O endpoint faz parte do contexto: resultados de um stub não valem para a API real
+    endpoint = (base_url or DEFAULT_BASE_URL).rstrip("/")
+    audit_context = f"{auditor.pages.sha256}|{endpoint}|{MODEL}|{TEMPERATURE}|{SYSTEM_PROMPT}"
+
+    def file_key(fpath):
+        key = os.path.relpath(fpath, DATA_DIR).replace(os.sep, "/")
+        return key, file_fingerprint([fpath], audit_context)
+
+    def reuse_previous(key, fingerprint):
+        """No modo incremental, reaproveita o resultado anterior se nada mudou"""
+        nonlocal reused_count
+        old = previous.get(key)
+        if old and old["fingerprint"] == fingerprint:
+            manifest[key] = old
+            entries.append((key, fingerprint, old["result"]))
+            reused_count += 1
+            return True
+        return False
     
     # 1. Auditoria de Raças
     print("Auditando Raças...")
-    race_files = glob.glob(os.path.join(DATA_DIR, "races", "*.ts"))
+    race_files = sorted(glob.glob(os.path.join(DATA_DIR, "races", "*.ts")))
     race_start = auditor.search_section("RAÇAS", 20)
     
     for fpath in race_files:
@@ -111,19 +239,20 @@ def run_audit(api_key):
         # Ex: anao -> Anão
         if item_name == "Anao": item_name = "Anão"
         
+        key, fingerprint = file_key(fpath)
+        if reuse_previous(key, fingerprint): continue
         print(f" -> Processando {item_name}...")
         pdf_text = auditor.extract_item_text(item_name, race_start, num_pages=2)
         code_text = auditor.get_code_content(fpath, item_name)
         
         if pdf_text and code_text:
-            result = auditor.audit(item_name, pdf_text, code_text, os.path.basename(fpath))
-            report_lines.append(result)
+            entries.append((key, fingerprint, audit_job(item_name, pdf_text, code_text, fpath)))
         else:
-            report_lines.append(f"AVISO: Não foi possível extrair dados para {item_name}")
+            entries.append((key, fingerprint, f"AVISO: Não foi possível extrair dados para {item_name}"))
 
     # 2. Auditoria de Classes
     print("Auditando Classes...")
-    class_files = glob.glob(os.path.join(DATA_DIR, "classes", "*.ts"))
+    class_files = sorted(glob.glob(os.path.join(DATA_DIR, "classes", "*.ts")))
     class_start = auditor.search_section("CLASSES", 40)
 
     for fpath in class_files:
@@ -134,52 +263,128 @@ def run_audit(api_key):
         if item_name == "Clerigo": item_name = "Clérigo"
         if item_name == "Indice": continue # Ignorar index.ts
         
+        key, fingerprint = file_key(fpath)
+        if reuse_previous(key, fingerprint): continue
         print(f" -> Processando {item_name}...")
         pdf_text = auditor.extract_item_text(item_name, class_start, num_pages=5)
         code_text = auditor.get_code_content(fpath, item_name)
         
         if pdf_text and code_text:
-            result = auditor.audit(item_name, pdf_text, code_text, os.path.basename(fpath))
-            report_lines.append(result)
+            entries.append((key, fingerprint, audit_job(item_name, pdf_text, code_text, fpath)))
         else:
-            report_lines.append(f"AVISO: Não foi possível extrair dados para {item_name}")
+            entries.append((key, fingerprint, f"AVISO: Não foi possível extrair dados para {item_name}"))
 
     # 3. Auditoria de Magias
+    # Cada magia de generalSpells.ts é alinhada ao seu título no PDF e as comparações
+    # são agrupadas em lotes que cabem em spell_batch_tokens. O manifesto guarda uma entrada
+    # por magia, e só as magias novas ou alteradas entram nos lotes.
     print("Auditando Magias...")
-    spell_files = [
-        os.path.join(DATA_DIR, "magias", "arcane.ts"),
-        os.path.join(DATA_DIR, "magias", "divine.ts")
-    ]
-    spell_start = auditor.search_section("MAGIAS", 150)
-
-    for fpath in spell_files:
-        if not os.path.exists(fpath): continue
-        print(f" -> Processando arquivo de magias {os.path.basename(fpath)}...")
-        # Como arquivos de magias são listas grandes, aqui poderíamos extrair magias individuais 
-        # mas por simplicidade e custo de tokens, vamos focar no cabeçalho ou magias principais
-        # Se o usuário quiser auditar TODAS as magias, o script precisaria de um loop interno.
-        # Para este MVP, processaremos o arquivo como um todo ou deixaremos nota.
-        code_text = auditor.get_code_content(fpath, "Magias")
-        # Busca genérica na seção de magias (primeiras 20 páginas da seção)
-        pdf_text = auditor.extract_text(list(range(spell_start, min(spell_start + 20, len(auditor.doc)))))
-        
-        if pdf_text and code_text:
-            result = auditor.audit("Grupo de Magias", pdf_text, code_text, os.path.basename(fpath))
-            report_lines.append(result)
+    spells_path = os.path.join(DATA_DIR, "magias", "generalSpells.ts")
+    if os.path.exists(spells_path):
+        spell_start = auditor.search_section("MAGIAS", 150)
+        records = load_spell_records(spells_path)
+        align_spells(auditor, records, spell_start)
+        missing = [r["name"] for r in records if not r["pdf_text"]]
+        if missing:
+            entries.append(("magias/sem-pdf", None,
+                            f"AVISO: Magias não encontradas no PDF ({len(missing)}): {', '.join(missing)}"))
+        found = [r for r in records if r["pdf_text"]]
+        changed, reused = [], []
+        for record in found:
+            key = f"magias/{record['key']}"
+            fingerprint = file_fingerprint([], audit_context + record["pdf_text"] + record["code"])
+            old = previous.get(key)
+            if old and old["fingerprint"] == fingerprint:
+                manifest[key] = old
+                reused.extend(line for line in old["result"].splitlines() if line not in reused)
+            else:
+                record["manifest_key"], record["fingerprint"] = key, fingerprint
+                changed.append(record)
+        reused_count += len(found) - len(changed)
+        if len(changed) < len(found):
+            entries.append(("magias/reaproveitadas", None,
+                            "\n".join([f"Magias sem alterações ({len(found) - len(changed)}):"] + reused)))
+        spell_jobs = pack_spell_batches(changed, spell_batch_tokens)
+        print(f" -> {len(found)} magias alinhadas ao PDF, {len(changed)} a auditar em {len(spell_jobs)} lotes")
+        for n, (batch, job) in enumerate(spell_jobs, 1):
+            entries.append((f"magias/lote-{n}", batch, job))
+
+    jobs = [e for _, _, e in entries if isinstance(e, dict)]
+    metrics.add_time("audit.prepare", time.perf_counter() - prepare_started)
+    # Todo o texto do PDF já foi lido: libera o pool de decodificação e o SQLite
+    auditor.pages.close()
+    count("audit.items", len(entries))
+    if incremental:
+        print(f"Modo incremental: {reused_count} itens reaproveitados sem alterações")
+    print(f"Enviando {len(jobs)} auditorias (concorrência {concurrency})...")
+    results = engine.run(jobs)
+    # Relatório e achados são gravados em streaming: uma execução interrompida
+    # ainda deixa no disco tudo o que já tinha voltado da API
+    with open(REPORT_PATH, "w", encoding="utf-8", buffering=1) as rf, \
+            FindingWriter(findings_path, "pdf_auditor") as findings, stage("audit.llm"):
+        rf.write("# RELATÓRIO DE AUDITORIA T20\n")
+        for key, fingerprint, entry in entries:
+            result = next(results) if isinstance(entry, dict) else entry
+            rf.write("\n\n" + result)
+            emit_result_findings(findings, key, result)
+            # Erros de API não entram no manifesto para serem tentados de novo na próxima execução
+            if result.startswith("ERRO") or fingerprint is None:
+                continue
+            if isinstance(fingerprint, list):
+                parts = split_batch_result(result, fingerprint)
+                for spell in fingerprint:
+                    manifest[spell["manifest_key"]] = {"fingerprint": spell["fingerprint"], "result": parts[spell["key"]]}
+            else:
+                manifest[key] = {"fingerprint": fingerprint, "result": result}
+        exit_code = findings.exit_code()
+        print(f"Achados: {findings.summary()} ({findings_path})")
 
-    # Salvar Relatório
-    with open(REPORT_PATH, "w", encoding="utf-8") as rf:
-        rf.write("\n\n".join(report_lines))
+        if cache:
+            st = cache.stats()
+            rf.write(
+                "\n\n---\n"
+                f"Cache de respostas: {st['hits']} acertos, {st['misses']} faltas "
+                f"({st['hit_rate']:.0%}), {st['evictions']} remoções LRU, "
+                f"{st['entries']} entradas ({st['bytes'] / 1024:.1f} KB)"
+            )
+            cache.close()
+    save_manifest(manifest)
     
     print(f"\nAuditoria concluída! Relatório gerado em: {REPORT_PATH}")
+    return exit_code
 
 if __name__ == "__main__":
     import sys
+    import argparse
+    parser = argparse.ArgumentParser(description="Audita os dados do app contra o Livro Básico")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Número de processos para decodificar páginas ainda fora do cache")
+    parser.add_argument("--concurrency", type=int, default=4, help="Chamadas simultâneas à API")
+    parser.add_argument("--rpm", type=int, default=60, help="Limite de requisições por minuto (0 = sem limite)")
+    parser.add_argument("--tpm", type=int, default=30000, help="Limite de tokens por minuto (0 = sem limite)")
+    parser.add_argument("--base-url", default=os.getenv("OPENAI_BASE_URL"),
+                        help="Endpoint compatível com a API da OpenAI (ex: stub local para testes)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Audita apenas arquivos novos ou alterados desde a última execução")
+    parser.add_argument("--spell-batch-tokens", type=int, default=6000,
+                        help="Orçamento estimado de tokens por lote de magias")
+    parser.add_argument("--no-cache", action="store_true", help="Ignora o cache de respostas do LLM")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help="Tamanho máximo do cache de respostas (LRU)")
+    parser.add_argument("--ndjson", default=FINDINGS_PATH,
+                        help="Arquivo NDJSON com um achado por linha")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    start(args.profile)
     # A chave será pedida pelo usuário conforme instrução
     key = os.getenv("OPENAI_API_KEY")
     if not key:
         print("ERRO: A variável de ambiente OPENAI_API_KEY não foi encontrada.")
         print("Por favor, execute: $env:OPENAI_API_KEY='sua_chave_aqui' (PowerShell)")
-        sys.exit(1)
+        sys.exit(2)
     
-    run_audit(key)
+    sys.exit(run_audit(key, workers=args.workers, concurrency=args.concurrency,
+              rpm=args.rpm, tpm=args.tpm, base_url=args.base_url,
+              use_cache=not args.no_cache, cache_max_bytes=int(args.cache_max_mb * 1024 * 1024),
+              incremental=args.incremental, spell_batch_tokens=args.spell_batch_tokens,
+              findings_path=args.ndjson))
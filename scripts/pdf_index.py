@@ -0,0 +1,75 @@
+import re
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+
+from instrumentation import stage
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+@lru_cache(maxsize=None)
+def fold(token):
+    """Remove acentos e normaliza caixa (ex: 'RAÇAS' -> 'racas')"""
+    nfkd_form = unicodedata.normalize('NFKD', token)
+    return "".join(c for c in nfkd_form if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text):
+    return [fold(t) for t in TOKEN_RE.findall(text)]
+
+
+class PageIndex:
+    """
+    Índice invertido das palavras do PDF.
+    Cada palavra normalizada aponta para uma lista ordenada de
+    (página, posição da palavra na página, offset de caractere no texto original).
+    """
+
+    def __init__(self, page_texts):
+        self.postings = {}
+        self.page_tokens = []
+        for page, text in enumerate(page_texts):
+            tokens = []
+            for pos, match in enumerate(TOKEN_RE.finditer(text)):
+                token = fold(match.group())
+                tokens.append(token)
+                self.postings.setdefault(token, []).append((page, pos, match.start()))
+            self.page_tokens.append(tokens)
+
+    @classmethod
+    def from_cache(cls, cache):
+        texts = cache.get_texts(range(len(cache)))
+        with stage("index.build"):
+            return cls(texts)
+
+    def __len__(self):
+        return len(self.page_tokens)
+
+    def find(self, phrase, start_page=0, end_page=None):
+        """
+        Retorna [(página, offset)] de cada ocorrência da frase (palavras inteiras,
+        sem diferenciar acentos ou caixa) entre start_page e end_page (exclusivo).
+        """
+        words = tokenize(phrase)
+        if not words:
+            return []
+        if end_page is None:
+            end_page = len(self.page_tokens)
+
+        postings = self.postings.get(words[0], [])
+        hits = []
+        for page, pos, offset in postings[bisect_left(postings, (start_page,)):]:
+            if page >= end_page:
+                break
+            if self.page_tokens[page][pos:pos + len(words)] == words:
+                hits.append((page, offset))
+        return hits
+
+    def pages_with(self, phrase, start_page=0, end_page=None):
+        """Páginas candidatas (ordenadas e sem repetição) que contêm a frase"""
+        pages = []
+        for page, _ in self.find(phrase, start_page, end_page):
+            if not pages or pages[-1] != page:
+                pages.append(page)
+        return pages
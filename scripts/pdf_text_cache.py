@@ -0,0 +1,223 @@
+import os
+import hashlib
+import sqlite3
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+
+from instrumentation import count, stage
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PDF_PATH = os.path.join(BASE_DIR, 'src', 'data', 'T20 - Livro Básico.pdf')
+CACHE_PATH = os.path.join(BASE_DIR, '.cache', 'pdf_text.sqlite')
+# Buffer limitado para a escrita em streaming dos arquivos extraídos
+WRITE_BUFFER_SIZE = 64 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    sha256 TEXT PRIMARY KEY,
+    page_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    sha256 TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    text BLOB NOT NULL,
+    PRIMARY KEY (sha256, page)
+) WITHOUT ROWID;
+"""
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def page_block(page, text):
+    """Bloco de texto de uma página no formato usado pelos arquivos extraídos"""
+    return f"\n--- Page {page+1} ---\n{text}"
+
+
+# Documento aberto uma vez em cada processo do pool (ver _init_worker)
+_worker_doc = None
+
+
+def _init_worker(pdf_path):
+    global _worker_doc
+    _worker_doc = fitz.open(pdf_path)
+
+
+def _decode_shard(pages):
+    # Executado em outro processo, com o documento aberto por _init_worker
+    return [_worker_doc[i].get_text() for i in pages]
+
+
+def decode_pages(pool, pages, workers):
+    """
+    Decodifica as páginas em paralelo, dividindo-as em blocos contíguos entre
+    os processos de `pool`. O resultado volta na mesma ordem de `pages`.
+    """
+    pages = list(pages)
+    shard_size = max(1, -(-len(pages) // (workers * 4)))
+    shards = [pages[i:i + shard_size] for i in range(0, len(pages), shard_size)]
+    texts = []
+    for shard_texts in pool.map(_decode_shard, shards):
+        texts.extend(shard_texts)
+    return texts
+
+
+class PageTextCache:
+    """
+    Cache persistente (SQLite) do texto de cada página do PDF.
+    As páginas são indexadas pelo hash do conteúdo do PDF, então qualquer
+    alteração no arquivo invalida o cache automaticamente.
+    O PDF só é aberto com o fitz quando alguma página ainda não está em cache.
+    Com workers > 1, as páginas ausentes são decodificadas em um pool de processos,
+    criado na primeira vez que é preciso e reaproveitado até close().
+    """
+
+    def __init__(self, pdf_path=PDF_PATH, cache_path=CACHE_PATH, workers=1):
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF não encontrado em: {pdf_path}")
+        self.pdf_path = os.path.abspath(pdf_path)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        self.conn = sqlite3.connect(cache_path)
+        self.conn.executescript(SCHEMA)
+        self.workers = workers
+        self._doc = None
+        self._pool = None
+        self._page_count = None
+        self.sha256 = self._resolve_hash()
+
+    def _resolve_hash(self):
+        # Evita recalcular o hash do PDF inteiro quando tamanho e mtime não mudaram
+        st = os.stat(self.pdf_path)
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, sha256 FROM files WHERE path = ?", (self.pdf_path,)
+        ).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+
+        with stage("pdf.hash"):
+            sha = file_sha256(self.pdf_path)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                (self.pdf_path, st.st_size, st.st_mtime_ns, sha),
+            )
+            if row and row[2] != sha:
+                self._purge(row[2])
+        return sha
+
+    def _purge(self, old_sha):
+        still_used = self.conn.execute(
+            "SELECT 1 FROM files WHERE sha256 = ? LIMIT 1", (old_sha,)
+        ).fetchone()
+        if not still_used:
+            self.conn.execute("DELETE FROM pages WHERE sha256 = ?", (old_sha,))
+            self.conn.execute("DELETE FROM documents WHERE sha256 = ?", (old_sha,))
+
+    @property
+    def doc(self):
+        if self._doc is None:
+            with stage("pdf.open"):
+                self._doc = fitz.open(self.pdf_path)
+        return self._doc
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(self.pdf_path,))
+        return self._pool
+
+    def __len__(self):
+        if self._page_count is None:
+            row = self.conn.execute(
+                "SELECT page_count FROM documents WHERE sha256 = ?", (self.sha256,)
+            ).fetchone()
+            if row:
+                self._page_count = row[0]
+            else:
+                self._page_count = len(self.doc)
+                with self.conn:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO documents (sha256, page_count) VALUES (?, ?)",
+                        (self.sha256, self._page_count),
+                    )
+        return self._page_count
+
+    def get_text(self, page):
+        """Retorna o texto de uma página (índice 0-based)"""
+        return self.get_texts([page])[0]
+
+    def get_texts(self, pages):
+        """Retorna o texto de várias páginas, decodificando apenas as que faltam no cache"""
+        pages = list(pages)
+        cached = {}
+        wanted = sorted(set(pages))
+        for start in range(0, len(wanted), 500):
+            batch = wanted[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                f"SELECT page, text FROM pages WHERE sha256 = ? AND page IN ({placeholders})",
+                (self.sha256, *batch),
+            )
+            for page, blob in rows:
+                cached[page] = zlib.decompress(blob).decode('utf-8')
+
+        count("pages.cache_hits", len(cached))
+
+        missing = [p for p in wanted if p not in cached]
+        if missing:
+            doc = self.doc if self.workers <= 1 or len(missing) == 1 else None
+            with stage("pdf.decode"):
+                if doc is None:
+                    texts = decode_pages(self.pool, missing, self.workers)
+                else:
+                    texts = [doc[page].get_text() for page in missing]
+            count("pages.decoded", len(missing))
+            with self.conn:
+                for page, text in zip(missing, texts):
+                    cached[page] = text
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO pages (sha256, page, text) VALUES (?, ?, ?)",
+                        (self.sha256, page, zlib.compress(text.encode('utf-8'))),
+                    )
+
+        return [cached[p] for p in pages]
+
+    def iter_pages(self, pages, batch_size=None):
+        """
+        Gera (página, texto) em ordem, lendo/decodificando em lotes pequenos
+        para que só um lote fique em memória por vez.
+        """
+        pages = list(pages)
+        if batch_size is None:
+            batch_size = max(32, self.workers * 8)
+        for start in range(0, len(pages), batch_size):
+            batch = pages[start:start + batch_size]
+            yield from zip(batch, self.get_texts(batch))
+
+    def iter_page_blocks(self, pages, batch_size=None):
+        """Gera o bloco '--- Page N ---' de cada página assim que ela é decodificada"""
+        for page, text in self.iter_pages(pages, batch_size):
+            yield page_block(page, text)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+        self.conn.close()
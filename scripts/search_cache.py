@@ -0,0 +1,68 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+
+from pdf_text_cache import BASE_DIR
+
+CACHE_PATH = os.path.join(BASE_DIR, '.cache', 'asset_searches.sqlite')
+# Resultados de busca valem por uma semana (os bancos de imagens mudam devagar)
+DEFAULT_TTL = 7 * 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    provider TEXT NOT NULL,
+    query TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    urls TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (provider, query, page)
+);
+"""
+
+
+class SearchCache:
+    """
+    Cache em disco (SQLite) das buscas de imagens: (provedor, busca, página) -> URLs dos resultados.
+    Buscas sem resultado também são guardadas, para não repetir a consulta dentro do TTL.
+    Pode ser usado por várias threads ao mesmo tempo.
+    """
+
+    def __init__(self, cache_path=CACHE_PATH, ttl=DEFAULT_TTL):
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        self.conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.ttl = ttl
+        self.lock = threading.Lock()
+
+    def get(self, provider, query, page=None):
+        """
+        URLs em cache ainda dentro do TTL, ou None. Sem `page`, aceita qualquer página
+        já buscada (modo aleatório); com `page`, só aquela (modo com semente).
+        """
+        oldest = time.time() - self.ttl
+        sql = "SELECT urls FROM searches WHERE provider = ? AND query = ? AND fetched_at >= ?"
+        params = [provider, query, oldest]
+        if page is not None:
+            sql += " AND page = ?"
+            params.append(page)
+        with self.lock:
+            row = self.conn.execute(sql + " ORDER BY fetched_at DESC LIMIT 1", params).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, provider, query, page, urls):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO searches (provider, query, page, urls, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (provider, query, page, json.dumps(urls), time.time()),
+            )
+
+    def purge(self):
+        """Remove as entradas vencidas; devolve quantas"""
+        with self.lock, self.conn:
+            cur = self.conn.execute("DELETE FROM searches WHERE fetched_at < ?", (time.time() - self.ttl,))
+        return cur.rowcount
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,137 @@
+import re
+
+from audit_engine import estimate_tokens
+from instrumentation import timed
+from pdf_index import fold
+from ts_scanner import iter_record_entries, mask_source
+
+# Quantas páginas após o início do capítulo de magias entram no índice de títulos
+SPELL_SECTION_PAGES = 60
+# Limite do trecho do PDF por magia, para uma magia mal alinhada não estourar o lote
+MAX_SPELL_EXCERPT = 4000
+
+
+def load_spell_records(spells_path):
+    """
+    Lê generalSpells.ts e devolve uma lista de magias na ordem dos enums spellsCircleNNames:
+    [{"key", "circle", "name", "code"}]
+    """
+    with open(spells_path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    entries = dict(iter_record_entries(source, mask_source(source)))
+
+    records = []
+    for enum_match in re.finditer(r'export\s+enum\s+spellsCircle(\d)Names\s*\{([^}]*)\}', source):
+        circle = int(enum_match.group(1))
+        for key in re.findall(r'(\w+)\s*=', enum_match.group(2)):
+            code = entries.get(key)
+            if not code:
+                continue
+            name_m = re.search(r'nome:\s*["\'](.+?)["\']', code)
+            records.append({
+                "key": key,
+                "circle": circle,
+                "name": name_m.group(1) if name_m else key,
+                "code": code,
+            })
+    return records
+
+
+def _is_heading(page_text, offset, name):
+    """O nome ocupa a linha inteira (como um título de magia no livro)?"""
+    line_start = page_text.rfind('\n', 0, offset) + 1
+    line_end = page_text.find('\n', offset)
+    line = page_text[line_start:line_end if line_end != -1 else len(page_text)]
+    return fold(line.strip()) == fold(name)
+
+
+@timed("audit.align_spells")
+def align_spells(auditor, records, start_page):
+    """
+    Localiza o título de cada magia no PDF através do índice de palavras e recorta
+    o texto entre esse título e o próximo título de magia.
+    Preenche record["pdf_text"] (ou None se a magia não foi encontrada).
+    """
+    end_page = min(start_page + SPELL_SECTION_PAGES, len(auditor.pages))
+    headings = []
+    for record in records:
+        hits = auditor.index.find(record["name"], start_page, end_page)
+        chosen = None
+        for page, offset in hits:
+            if _is_heading(auditor.pages.get_text(page), offset, record["name"]):
+                chosen = (page, offset)
+                break
+        record["pdf_text"] = None
+        if chosen:
+            headings.append((chosen, record))
+
+    headings.sort(key=lambda h: h[0])
+    for idx, ((page, offset), record) in enumerate(headings):
+        if idx + 1 < len(headings):
+            next_page, next_offset = headings[idx + 1][0]
+        else:
+            next_page, next_offset = page, None
+        parts = []
+        for p in range(page, next_page + 1):
+            text = auditor.pages.get_text(p)
+            start = offset if p == page else 0
+            end = next_offset if p == next_page else len(text)
+            parts.append(text[start:end])
+        record["pdf_text"] = "".join(parts)[:MAX_SPELL_EXCERPT]
+
+
+def pack_spell_batches(records, token_budget):
+    """
+    Agrupa magias consecutivas em lotes cujo prompt estimado cabe em token_budget.
+    Cada lote vira um job com o trecho do PDF e o código de todas as suas magias.
+    Devolve [(magias do lote, job)].
+    """
+    batches = []
+    current, used = [], 0
+    for record in records:
+        cost = estimate_tokens(record["pdf_text"], record["code"])
+        if current and used + cost > token_budget:
+            batches.append(current)
+            current, used = [], 0
+        current.append(record)
+        used += cost
+    if current:
+        batches.append(current)
+
+    jobs = []
+    for batch in batches:
+        names = ", ".join(r["name"] for r in batch)
+        jobs.append((batch, {
+            "item_name": f"Magias ({names})",
+            "pdf_text": "\n\n".join(f"### {r['name']}\n{r['pdf_text']}" for r in batch),
+            "code_text": "\n\n".join(f"// {r['name']}\n{r['code']}" for r in batch),
+            "file_name": "generalSpells.ts",
+        }))
+    return jobs
+
+
+def parse_result_row(line):
+    """Colunas de uma linha "ARQUIVO -> ITEM -> ATUAL -> SUGERIDO -> MOTIVO", ou None"""
+    cols = [c.strip(" |*`[]") for c in line.split("->")]
+    if len(cols) != 5 or cols[0].upper() == "ARQUIVO":
+        return None
+    return cols
+
+
+def split_batch_result(result, batch):
+    """
+    Reparte a resposta de um lote entre as suas magias, para o manifesto do modo incremental
+    guardar um resultado por magia: cada linha da tabela vai para a magia citada em ITEM;
+    linhas que não citam nenhuma magia do lote vão para todas. Devolve {key: texto}.
+    """
+    names = [(r["key"], fold(r["name"])) for r in batch]
+    parts = {key: [] for key, _ in names}
+    for line in result.splitlines():
+        cols = parse_result_row(line)
+        if cols is None:
+            continue
+        item = fold(cols[1])
+        owners = [key for key, name in names if name in item or (item and item in name)]
+        for key in owners or parts:
+            parts[key].append(line)
+    return {key: "\n".join(lines) for key, lines in parts.items()}
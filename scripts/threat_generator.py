@@ -0,0 +1,339 @@
+import os
+import sys
+import json
+import argparse
+import re
+from datetime import datetime, timezone
+
+import numpy as np
+
+from combat_tables import (ABS_TOLERANCE, COMBAT_TABLES_PATH, REL_TOLERANCE, ROLES, STAT_FIELDS,
+                           CombatTables, role_key)
+from challenge_levels import (BASE_DIR, THREAT_SHEET_PATH, load_enum, nd_label, nd_member, nd_value,
+                              normalize_nd)
+
+ATRIBUTOS_PATH = os.path.join(BASE_DIR, 'src', 'data', 'atributos.ts')
+SKILLS_PATH = os.path.join(BASE_DIR, 'src', 'interfaces', 'Skills.ts')
+
+# Ameaças geradas por lote; cada lote é sorteado e montado de uma vez com NumPy
+BATCH_SIZE = 10000
+# Membros de ResistanceType na ordem forte/média/fraca, com a resistência de combatStats de cada um
+RESISTANCE_FIELDS = [("STRONG", "strongSave"), ("MEDIUM", "mediumSave"), ("WEAK", "weakSave")]
+RESISTANCE_SAVES = ["Fortitude", "Reflexos", "Vontade"]
+DEFAULT_DISPLACEMENT = "9m"
+# Mesmo tesouro padrão do formulário do mestre (MestreClient.tsx)
+DEFAULT_TREASURE = "STANDARD"
+# parseNDValue() em threatGenerator.ts difere da ordenação do livro nestes NDs;
+# perícias (metade do ND) e pontos de mana seguem o app
+SHEET_ND_VALUES = {"1/3": 0.33, "S": 20, "S+": 21}
+
+
+def load_skill_attributes(source):
+    """Lê `export enum SkillsAttrs { Nome = Atributo.MEMBRO, ... }` e devolve [(perícia, membro)]"""
+    m = re.search(r'export\s+enum\s+SkillsAttrs\s*\{([^}]*)\}', source)
+    if not m:
+        return []
+    return re.findall(r'["\']?([^\s"\',=][^"\',=]*?)["\']?\s*=\s*Atributo\.(\w+)', m.group(1))
+
+
+def load_sheet_enums(sheet_path=THREAT_SHEET_PATH, atributos_path=ATRIBUTOS_PATH, skills_path=SKILLS_PATH):
+    """
+    Enums usados pela ThreatSheet, como [(membro, valor)], e as perícias de SkillsAttrs
+    como [(perícia, (membro, valor) do atributo)], na ordem de calculateAllSkills().
+    """
+    with open(sheet_path, 'r', encoding='utf-8') as f:
+        sheet = f.read()
+    enums = {name: load_enum(sheet, name) for name in ("ThreatType", "ThreatSize", "ResistanceType", "TreasureLevel")}
+    with open(atributos_path, 'r', encoding='utf-8') as f:
+        enums["Atributo"] = load_enum(f.read(), "Atributo")
+    with open(skills_path, 'r', encoding='utf-8') as f:
+        skills = load_skill_attributes(f.read())
+    attributes = dict(enums["Atributo"])
+    enums["skills"] = sorted(((name, (member, attributes[member])) for name, member in skills),
+                             key=lambda s: s[0])
+    return enums
+
+
+def sheet_nd_value(nd):
+    """ND normalizado -> valor numérico de parseNDValue() no app"""
+    return SHEET_ND_VALUES.get(nd_label(nd), nd_value(nd))
+
+
+def parse_nd_filter(spec, nd_keys):
+    """
+    '1/4,1,5-10' -> índices das linhas de ND (na ordem de nd_keys).
+    Intervalos usam o valor numérico do ND normalizado.
+    """
+    if not spec:
+        return list(range(len(nd_keys)))
+    values = [nd_value(nd) for nd in nd_keys]
+    selected = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        low, sep, high = part.partition('-')
+        if sep:
+            lo, hi = nd_value(low), nd_value(high)
+            if lo is None or hi is None:
+                raise ValueError(f"Intervalo de ND inválido: '{part}'")
+            selected.update(i for i, v in enumerate(values) if lo <= v <= hi)
+        else:
+            nd = normalize_nd(part)
+            if nd not in nd_keys:
+                raise ValueError(f"ND '{part}' não existe nas COMBAT_TABLES")
+            selected.add(nd_keys.index(nd))
+    return sorted(selected)
+
+
+class ThreatBatchGenerator:
+    """
+    Gera fichas de ameaça em lote a partir das COMBAT_TABLES.
+    As combinações (papel, ND) pedidas viram um array de pares válidos; cada lote sorteia
+    índices nesse array e copia as estatísticas com indexação vetorizada.
+    jitter desloca cada estatística em até jitter * faixa de tolerância do validador;
+    com jitter <= 1 as ameaças geradas continuam dentro da tolerância de validate_combat_stats.
+    A mesma semente e a mesma quantidade sempre produzem as mesmas ameaças.
+    """
+
+    def __init__(self, tables, enums, roles=None, nd_spec=None, seed=None, jitter=0.0, mana_rate=0.0,
+                 created_at=None):
+        self.tables = tables
+        self.rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.jitter = jitter
+        self.mana_rate = mana_rate
+        self.threat_types = enums["ThreatType"]
+        self.threat_sizes = enums["ThreatSize"]
+        self.attributes = enums["Atributo"]
+        self.skills = enums["skills"]
+        resistance = dict(enums["ResistanceType"])
+        self.resistances = [((member, resistance[member]), field) for member, field in RESISTANCE_FIELDS]
+        self.treasure = (DEFAULT_TREASURE, dict(enums["TreasureLevel"])[DEFAULT_TREASURE])
+        # Mesma data em todas as fichas do lote; fixá-la deixa a saída reproduzível
+        self.created_at = created_at or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+        role_idx = [ROLES.index(r) for r in (roles or ROLES)]
+        nd_idx = parse_nd_filter(nd_spec, tables.nd_keys)
+        pairs = np.array([(r, n) for r in role_idx for n in nd_idx], dtype=np.intp).reshape(-1, 2)
+        # Combinações sem linha na tabela (NaN) não são sorteadas
+        if len(pairs):
+            pairs = pairs[~np.isnan(tables.values[pairs[:, 0], pairs[:, 1]]).any(axis=1)]
+        if not len(pairs):
+            raise ValueError("Nenhuma combinação de papel e ND disponível nas COMBAT_TABLES")
+        self.pairs = pairs
+        self.nd_values = np.array([sheet_nd_value(nd) for nd in tables.nd_keys])
+        self.generated = 0
+
+    def batch(self, n):
+        """Sorteia n ameaças; devolve um dict de arrays (uma posição por ameaça)"""
+        rng = self.rng
+        chosen = self.pairs[rng.integers(len(self.pairs), size=n)]
+        role_idx, nd_idx = chosen[:, 0], chosen[:, 1]
+        stats = self.tables.values[role_idx, nd_idx]
+
+        if self.jitter:
+            band = np.maximum(ABS_TOLERANCE, REL_TOLERANCE * np.abs(stats))
+            # O arredondamento não pode empurrar o valor para fora de jitter * faixa
+            limit = np.floor(self.jitter * band)
+            offset = np.rint(rng.uniform(-self.jitter, self.jitter, stats.shape) * band)
+            stats = stats + np.clip(offset, -limit, limit)
+        stats = np.rint(stats).astype(np.int64)
+        # Pontos de vida e dano nunca abaixo de 1
+        for field in ("hitPoints", "averageDamage"):
+            j = STAT_FIELDS.index(field)
+            np.maximum(stats[:, j], 1, out=stats[:, j])
+
+        has_mana = rng.random(n) < self.mana_rate
+        mana = np.ceil(self.nd_values[nd_idx] * 3).astype(np.int64)
+        # Cada linha é uma permutação de (forte, média, fraca) para Fortitude/Reflexos/Vontade
+        resistances = rng.permuted(np.tile(np.arange(3), (n, 1)), axis=1)
+
+        first = self.generated
+        self.generated += n
+        return {
+            "ids": np.arange(first, first + n),
+            "role_idx": role_idx,
+            "nd_idx": nd_idx,
+            "stats": stats,
+            "has_mana": has_mana,
+            "mana": mana,
+            "half_nd": np.floor(self.nd_values[nd_idx] / 2).astype(np.int64),
+            "resistances": resistances,
+            "types": rng.integers(len(self.threat_types), size=n),
+            "sizes": rng.integers(len(self.threat_sizes), size=n),
+        }
+
+    def iter_batches(self, count, batch_size=BATCH_SIZE):
+        remaining = count
+        while remaining > 0:
+            n = min(batch_size, remaining)
+            yield self.batch(n)
+            remaining -= n
+
+
+def iter_records(gen, batch):
+    """
+    Converte um lote em fichas no formato de ThreatSheet (src/interfaces/ThreatSheet.ts).
+    Campos de enum ficam como pares (membro, valor); cada formato de saída escolhe o lado.
+    As perícias seguem calculateAllSkills(): metade do ND + atributo (0) + resistência.
+    """
+    stats = batch["stats"].tolist()
+    half_nd = batch["half_nd"].tolist()
+    for i, threat_id in enumerate(batch["ids"].tolist()):
+        role = ROLES[batch["role_idx"][i]]
+        nd = gen.tables.nd_keys[batch["nd_idx"][i]]
+        combat = dict(zip(STAT_FIELDS, stats[i]))
+        if batch["has_mana"][i]:
+            combat["manaPoints"] = int(batch["mana"][i])
+        assignments = {save: gen.resistances[r] for save, r in zip(RESISTANCE_SAVES, batch["resistances"][i].tolist())}
+        skills = [{
+            "name": name,
+            "attribute": attribute,
+            "trained": False,
+            "customBonus": 0,
+            "total": half_nd[i] + (combat[assignments[name][1]] if name in assignments else 0),
+        } for name, attribute in gen.skills]
+        yield {
+            "id": f"gen_{gen.seed if gen.seed is not None else 'x'}_{threat_id}",
+            "name": f"{role.capitalize()} ND {nd_label(nd)} #{threat_id + 1}",
+            "type": gen.threat_types[batch["types"][i]],
+            "size": gen.threat_sizes[batch["sizes"][i]],
+            "role": (role.upper(), role.capitalize()),
+            "challengeLevel": (nd_member(nd), nd_label(nd)),
+            "displacement": DEFAULT_DISPLACEMENT,
+            "combatStats": combat,
+            "hasManaPoints": bool(batch["has_mana"][i]),
+            "attacks": [],
+            "abilities": [],
+            "attributes": {attribute: 0 for attribute in gen.attributes},
+            "skills": skills,
+            "resistanceAssignments": {save: level for save, (level, _) in assignments.items()},
+            "equipment": "",
+            "treasureLevel": gen.treasure,
+            "createdAt": gen.created_at,
+            "updatedAt": gen.created_at,
+        }
+
+
+def enum_values(value):
+    """Troca os pares (membro, valor) pelo valor do enum, como o app grava os dados"""
+    if isinstance(value, tuple):
+        return value[1]
+    if isinstance(value, dict):
+        return {enum_values(k): enum_values(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [enum_values(v) for v in value]
+    return value
+
+
+def ndjson_line(record):
+    """Ficha no formato de dados do app (valores dos enums, não os nomes)"""
+    return json.dumps(enum_values(record), ensure_ascii=False) + "\n"
+
+
+def ts_object(record):
+    """Ficha como literal TS usando os enums de ThreatSheet.ts e atributos.ts"""
+    attrs = "".join(f"      [Atributo.{k[0]}]: {v},\n" for k, v in record["attributes"].items())
+    skills = "".join(
+        f"      {{ name: {json.dumps(s['name'], ensure_ascii=False)}, attribute: Atributo.{s['attribute'][0]}, "
+        f"trained: {'true' if s['trained'] else 'false'}, customBonus: {s['customBonus']}, total: {s['total']} }},\n"
+        for s in record["skills"]
+    )
+    res = "".join(f"      {k}: ResistanceType.{v[0]},\n" for k, v in record["resistanceAssignments"].items())
+    combat = "".join(f"      {k}: {v},\n" for k, v in record["combatStats"].items())
+    return (
+        "  {\n"
+        f"    id: {json.dumps(record['id'])},\n"
+        f"    name: {json.dumps(record['name'], ensure_ascii=False)},\n"
+        f"    type: ThreatType.{record['type'][0]},\n"
+        f"    size: ThreatSize.{record['size'][0]},\n"
+        f"    role: ThreatRole.{record['role'][0]},\n"
+        f"    challengeLevel: ChallengeLevel.{record['challengeLevel'][0]},\n"
+        f"    displacement: {json.dumps(record['displacement'])},\n"
+        f"    combatStats: {{\n{combat}    }},\n"
+        f"    hasManaPoints: {'true' if record['hasManaPoints'] else 'false'},\n"
+        "    attacks: [],\n"
+        "    abilities: [],\n"
+        f"    attributes: {{\n{attrs}    }},\n"
+        f"    skills: [\n{skills}    ],\n"
+        f"    resistanceAssignments: {{\n{res}    }},\n"
+        f"    equipment: {json.dumps(record['equipment'])},\n"
+        f"    treasureLevel: TreasureLevel.{record['treasureLevel'][0]},\n"
+        f"    createdAt: new Date({json.dumps(record['createdAt'])}),\n"
+        f"    updatedAt: new Date({json.dumps(record['updatedAt'])}),\n"
+        "  },\n"
+    )
+
+
+TS_HEADER = (
+    "// Gerado por scripts/threat_generator.py - não editar manualmente\n"
+    "import {\n"
+    "  ChallengeLevel,\n"
+    "  ResistanceType,\n"
+    "  ThreatRole,\n"
+    "  ThreatSheet,\n"
+    "  ThreatSize,\n"
+    "  ThreatType,\n"
+    "  TreasureLevel,\n"
+    "} from \"../../interfaces/ThreatSheet\";\n"
+    "import { Atributo } from \"../atributos\";\n\n"
+    "export const {name}: ThreatSheet[] = [\n"
+)
+
+
+def generate(count, output="-", fmt="ndjson", export_name="GENERATED_THREATS", batch_size=BATCH_SIZE, **options):
+    """Gera `count` ameaças e as escreve em streaming (um lote por vez) em `output` ('-' = stdout)"""
+    if not os.path.exists(COMBAT_TABLES_PATH):
+        print(f"ERRO: {COMBAT_TABLES_PATH} não encontrado", file=sys.stderr)
+        return 2
+    tables = CombatTables.load(COMBAT_TABLES_PATH)
+
+    gen = ThreatBatchGenerator(tables, load_sheet_enums(), **options)
+
+    out = sys.stdout if output == "-" else open(output, 'w', encoding='utf-8', newline='\n')
+    try:
+        if fmt == "ts":
+            out.write(TS_HEADER.replace("{name}", export_name))
+        render = ts_object if fmt == "ts" else ndjson_line
+        for batch in gen.iter_batches(count, batch_size):
+            out.write("".join(render(r) for r in iter_records(gen, batch)))
+        if fmt == "ts":
+            out.write("];\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if output != "-":
+        print(f"{gen.generated} ameaças geradas em {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera fichas de ameaça em lote a partir das COMBAT_TABLES")
+    parser.add_argument("--count", type=int, default=100, help="Quantidade de ameaças")
+    parser.add_argument("--roles", default=",".join(ROLES),
+                        help="Papéis sorteados, separados por vírgula (solo, lacaio, especial)")
+    parser.add_argument("--nd", default=None, help="NDs sorteados, ex: '1/4,1/2,5-10' (padrão: todos)")
+    parser.add_argument("--seed", type=int, default=None, help="Semente para resultados reproduzíveis")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Variação das estatísticas, em faixas de tolerância do validador (0 = valores da tabela)")
+    parser.add_argument("--mana-rate", type=float, default=0.0,
+                        help="Fração das ameaças com pontos de mana (3 x ND)")
+    parser.add_argument("--format", choices=["ndjson", "ts"], default="ndjson")
+    parser.add_argument("--export-name", default="GENERATED_THREATS", help="Nome da constante no módulo TS")
+    parser.add_argument("--output", default="-", help="Arquivo de saída ('-' = stdout)")
+    parser.add_argument("--created-at", default=None,
+                        help="Data ISO de createdAt/updatedAt (padrão: agora); fixe para saída reproduzível")
+    args = parser.parse_args()
+
+    roles = [role_key(r) for r in args.roles.split(',') if r.strip()]
+    if None in roles:
+        parser.error(f"papel inválido em --roles: {args.roles}")
+    try:
+        code = generate(args.count, args.output, args.format, args.export_name,
+                        roles=roles, nd_spec=args.nd, seed=args.seed, jitter=args.jitter,
+                        mana_rate=args.mana_rate, created_at=args.created_at)
+    except ValueError as e:
+        print(f"ERRO: {e}", file=sys.stderr)
+        code = 2
+    sys.exit(code)
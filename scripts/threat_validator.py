@@ -1,120 +1,176 @@
 import os
 import re
+import json
+import time
 import pdfplumber
 import sys
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from challenge_levels import nd_value, normalize_nd
+from findings import FindingWriter
+from instrumentation import add_profile_argument, count, stage, start
+from combat_tables import ROLES, STAT_FIELDS, CombatTables, role_key
+from encounter_sim import difficulty_mismatches
+from pdf_index import fold
+from pdf_text_cache import PageTextCache
+from ts_scanner import iter_declarations
 
 # Paths
-BASE_DIR = r"c:\Users\welde\Dev\Projetos\rpg-cousins"
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 THREATS_DIR = os.path.join(BASE_DIR, 'src', 'data', 'threats')
 PDF_PATH = os.path.join(BASE_DIR, 'src', 'data', 'T20 - Livro Básico.pdf')
 REPORT_PATH = os.path.join(BASE_DIR, 'THREAT_ERRORS.md')
+FINDINGS_PATH = os.path.join(BASE_DIR, 'THREAT_ERRORS.ndjson')
+# Tabelas de ND já extraídas do PDF, indexadas pelo hash do PDF
+TABLES_CACHE_PATH = os.path.join(BASE_DIR, '.cache', 'nd_tables.json')
+
+TABLE_ROLES = ["solo", "lacaio", "especial"]
+# Colunas das tabelas de estatísticas, na ordem do livro (parse_stats_rows depende dela)
+STATS_COLUMNS = ["nd", "ataque", "dano", "defesa", "forte", "media", "fraca", "pv", "cd"]
+STATS_HEADER_RE = re.compile(r'\b' + r'\s+'.join(STATS_COLUMNS) + r'\b')
+# O título de cada tabela (ex: "Ameaças Solo") é uma linha curta logo acima do cabeçalho
+MAX_HEADING_LENGTH = 60
+
 
-# ND Mapping
-ND_MAP = {
-    "ChallengeLevel.QUARTER": "0.25",
-    "ChallengeLevel.HALF": "0.5",
-    "ChallengeLevel.ONE": "1",
-    "ChallengeLevel.TWO": "2",
-    "ChallengeLevel.THREE": "3",
-    "ChallengeLevel.FOUR": "4",
-    "ChallengeLevel.FIVE": "5",
-    "ChallengeLevel.SIX": "6",
-    "ChallengeLevel.SEVEN": "7",
-    "ChallengeLevel.EIGHT": "8",
-    "ChallengeLevel.NINE": "9",
-    "ChallengeLevel.TEN": "10",
-    "ChallengeLevel.ELEVEN": "11",
-    "ChallengeLevel.TWELVE": "12",
-    "ChallengeLevel.THIRTEEN": "13",
-    "ChallengeLevel.FOURTEEN": "14",
-    "ChallengeLevel.FIFTEEN": "15",
-    "ChallengeLevel.SIXTEEN": "16",
-    "ChallengeLevel.SEVENTEEN": "17",
-    "ChallengeLevel.EIGHTEEN": "18",
-    "ChallengeLevel.NINETEEN": "19",
-    "ChallengeLevel.TWENTY": "20",
-    "ChallengeLevel.S": "21",
-    "ChallengeLevel.S_PLUS": "22",
-    "1/4": "0.25",
-    "1/2": "0.5",
-    "1": "1",
-    "2": "2",
-    "3": "3",
-    "4": "4",
-    "5": "5",
-    "6": "6",
-    "7": "7",
-    "8": "8",
-    "9": "9",
-    "10": "10",
-    "11": "11",
-    "12": "12",
-    "13": "13",
-    "14": "14",
-    "15": "15",
-    "16": "16",
-    "17": "17",
-    "18": "18",
-    "19": "19",
-    "20": "20",
-    "S": "21",
-    "S+": "22"
-}
+class TableLayoutError(Exception):
+    """As tabelas de ND não foram encontradas no PDF com o layout esperado"""
 
 def clean_text(text):
     if not text: return ""
     return text.strip().replace('\n', ' ')
 
-def normalize_nd(val):
-    val = clean_text(str(val)).replace(',', '.')
-    if val in ND_MAP:
-        return ND_MAP[val]
-    # Try looking up via key
-    if val.startswith("ChallengeLevel."):
-        return ND_MAP.get(val, val)
-    return val
-
-def extract_table_from_pdf(pdf_path, page_num=320):
-    print(f"Reading PDF: {pdf_path} around page {page_num}...")
+def parse_stats_rows(rows):
+    """Converte as linhas de uma tabela do pdfplumber em {nd: {atk, damage, def, hp}}"""
     stats_db = {}
+    for row in rows[1:]:
+        clean_row = [clean_text(str(c)) for c in row if c]
+        if not clean_row: continue
+        nd_raw = clean_row[0]
+        nd_key = normalize_nd(nd_raw)
+        
+        stats_db[nd_key] = {
+            "atk": clean_row[1] if len(clean_row)>1 else "?",
+            "damage": clean_row[2] if len(clean_row)>2 else "?",
+            "def": clean_row[3] if len(clean_row)>3 else "?",
+            "hp": clean_row[7] if len(clean_row)>7 else "?"
+        }
+    return stats_db
+
+def is_stats_header(row):
+    """A linha tem exatamente as colunas de STATS_COLUMNS, nessa ordem?"""
+    return [fold(clean_text(str(c))) for c in row if c] == STATS_COLUMNS
+
+def heading_roles(text):
+    """Papéis cujas tabelas aparecem no texto da página: título curto + cabeçalho de colunas"""
+    folded = fold(text)
+    roles = []
+    for match in STATS_HEADER_RE.finditer(folded):
+        lines = [l.strip() for l in folded[:match.start()].splitlines() if l.strip()]
+        heading = lines[-1] if lines else ""
+        if len(heading) > MAX_HEADING_LENGTH:
+            continue
+        words = set(re.findall(r'\w+', heading))
+        roles.extend(role for role in TABLE_ROLES if role in words)
+    return roles
+
+def find_table_pages(cache):
+    """
+    Passada barata só de texto (via cache de páginas) que devolve {papel: página}.
+    Só as páginas que citam a última coluna ("Fraca") são normalizadas e examinadas; uma
+    página só conta se tem o título da tabela ("... Solo") seguido do cabeçalho completo de
+    colunas, já que fichas de monstro citam ND, ataque e defesa mas não têm esse layout.
+    Levanta TableLayoutError se algum papel não tiver exatamente uma tabela (em uma página).
+    """
+    found = {role: [] for role in TABLE_ROLES}
+    for page, text in cache.iter_pages(range(len(cache))):
+        if "fraca" not in text.lower():
+            continue
+        for role in heading_roles(text):
+            found[role].append(page)
+
+    problems = [f"{role}: {'nenhuma página' if not pages else 'páginas ' + ', '.join(str(p + 1) for p in pages)}"
+                for role, pages in found.items() if len(pages) != 1]
+    if problems:
+        raise TableLayoutError("Tabelas de ND não encontradas com exatamente uma tabela por papel ("
+                               + "; ".join(problems) + ")")
+    return {role: pages[0] for role, pages in found.items()}
+
+def table_role(page, table, previous_bottom):
+    """Descobre o papel (solo/lacaio/especial) pelo título logo acima da tabela"""
+    above = page.within_bbox((0, previous_bottom, page.width, table.bbox[1])).extract_text() or ""
+    words = set(fold(w) for w in re.findall(r'\w+', above))
+    for role in TABLE_ROLES:
+        if role in words:
+            return role
+    return None
+
+def load_cached_tables(pdf_hash, cache_path=TABLES_CACHE_PATH):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return cached["tables"] if cached.get("sha256") == pdf_hash else None
+
+def save_cached_tables(pdf_hash, tables, cache_path=TABLES_CACHE_PATH):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump({"sha256": pdf_hash, "tables": tables}, f, ensure_ascii=False, indent=2)
+
+def extract_tables_from_pdf(pdf_path):
+    """
+    Retorna {"solo": {...}, "lacaio": {...}, "especial": {...}} lidos do PDF.
+    O pdfplumber só roda nas páginas das tabelas e o resultado fica em cache pelo hash do PDF.
+    Levanta TableLayoutError se o PDF existe mas as tabelas não estão no layout esperado.
+    """
+    tables = {}
     if not os.path.exists(pdf_path):
         print("PDF not found.")
-        return stats_db
+        return tables
 
+    cache = None
     try:
+        cache = PageTextCache(pdf_path)
+        pdf_hash = cache.sha256
+        cached = load_cached_tables(pdf_hash)
+        if cached is not None:
+            print("Using cached ND tables.")
+            return cached
+
+        role_pages = find_table_pages(cache)
+        pages = sorted(set(role_pages.values()))
+        print(f"Reading PDF: {pdf_path} (table pages: {[p + 1 for p in pages]})...")
         with pdfplumber.open(pdf_path) as pdf:
-            found = False
-            for i in range(318, 324):
-                if i >= len(pdf.pages): break
+            for i in pages:
                 page = pdf.pages[i]
-                rows = page.extract_table()
-                if not rows: continue
-                
-                header = [str(c).lower() for c in rows[0] if c]
-                header_str = " ".join(header)
-                if "nd" in header_str and ("ataque" in header_str or "atk" in header_str):
-                    print(f"Found table on page index {i}")
-                    for row in rows[1:]:
-                        clean_row = [clean_text(str(c)) for c in row if c]
-                        if not clean_row: continue
-                        nd_raw = clean_row[0]
-                        nd_key = normalize_nd(nd_raw)
-                        
-                        stats_db[nd_key] = {
-                            "atk": clean_row[1] if len(clean_row)>1 else "?",
-                            "damage": clean_row[2] if len(clean_row)>2 else "?",
-                            "def": clean_row[3] if len(clean_row)>3 else "?",
-                            "hp": clean_row[7] if len(clean_row)>7 else "?"
-                        }
-                    found = True
-                    break
-            if not found:
-                print("Could not find stats table in likely pages.")
-                
+                previous_bottom = 0
+                for table in page.find_tables():
+                    rows = table.extract()
+                    if rows and is_stats_header(rows[0]):
+                        role = table_role(page, table, previous_bottom)
+                        if role_pages.get(role) == i and role not in tables:
+                            print(f"Found {role} table on page index {i}")
+                            tables[role] = parse_stats_rows(rows)
+                    previous_bottom = table.bbox[3]
+        missing = [role for role in TABLE_ROLES if role not in tables]
+        if missing:
+            raise TableLayoutError(f"Tabelas sem título ou colunas reconhecíveis no PDF: {', '.join(missing)}")
+        save_cached_tables(pdf_hash, tables)
+
+    except TableLayoutError:
+        raise
     except Exception as e:
         print(f"Error reading PDF: {e}")
+    finally:
+        # Libera a conexão SQLite e o pool de decodificação do cache de páginas
+        if cache is not None:
+            cache.close()
 
-    return stats_db
+    return tables
+
+def extract_table_from_pdf(pdf_path, role="solo"):
+    return extract_tables_from_pdf(pdf_path).get(role, {})
 
 def extract_table_from_code():
     table_path = os.path.join(THREATS_DIR, 'combatTables.ts')
@@ -152,104 +208,371 @@ def extract_table_from_code():
 
     return stats_db
 
+def iter_threat_objects(value):
+    """Percorre o valor declarado e gera cada objeto que tem ND (nd ou challengeLevel)"""
+    if isinstance(value, dict):
+        if "nd" in value or "challengeLevel" in value:
+            yield value
+            return
+        for v in value.values():
+            yield from iter_threat_objects(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from iter_threat_objects(v)
+
+def numeric_fields(obj, field):
+    """
+    Lê atributos/perícias como {nome: (valor, linha)}.
+    Aceita objetos ({ [Atributo.FORCA]: 2 }) e listas de ThreatSkill ({ name, total }).
+    """
+    values = {}
+    container = obj.get(field)
+    if isinstance(container, dict):
+        for key, val in container.items():
+            if isinstance(val, (int, float)) and not isinstance(val, bool):
+                values[str(key).split('.')[-1]] = (val, container.key_lines.get(key, container.line))
+    elif isinstance(container, list):
+        for item in container:
+            if isinstance(item, dict) and isinstance(item.get("total"), (int, float)):
+                values[str(item.get("name"))] = (item["total"], item.line)
+    return values
+
+SAVE_FIELDS = {"strong": "strongSave", "medium": "mediumSave", "weak": "weakSave"}
+
+def combat_fields(obj, skills):
+    """
+    Estatísticas de combate declaradas pela ameaça, como {campo: (valor, linha)}.
+    Usa combatStats quando existe; senão deriva ataque/dano dos ataques e as
+    resistências das perícias Fortitude/Reflexos/Vontade + resistanceAssignments.
+    """
+    combat = {}
+    stats = obj.get("combatStats")
+    if isinstance(stats, dict):
+        for field in STAT_FIELDS:
+            val = stats.get(field)
+            if isinstance(val, (int, float)) and not isinstance(val, bool):
+                combat[field] = (val, stats.key_lines.get(field, stats.line))
+
+    attacks = [a for a in obj.get("attacks") or [] if isinstance(a, dict)]
+    for field, source in (("attackValue", "attackBonus"), ("averageDamage", "averageDamage")):
+        values = [(a[source], a.line) for a in attacks if isinstance(a.get(source), (int, float))]
+        if field not in combat and values:
+            combat[field] = max(values)
+
+    assignments = obj.get("resistanceAssignments")
+    if isinstance(assignments, dict):
+        for save, level in assignments.items():
+            field = SAVE_FIELDS.get(str(level).split('.')[-1].lower())
+            if field and field not in combat and save in skills:
+                combat[field] = skills[save]
+    return combat
+
 def parse_ts_file(filepath):
+    """
+    Lê o arquivo com o parser de literais (uma passada, respeitando chaves e strings)
+    e devolve um registro por ameaça, com a linha de cada campo.
+    """
     threats = []
+    # O parser trabalha sobre str, então o arquivo é lido inteiro de uma vez
     with open(filepath, 'r', encoding='utf-8') as f:
         content = f.read()
 
-    nd_matches = re.finditer(r'nd:\s*(ChallengeLevel\.[A-Z_]+)', content)
-    
-    for match in nd_matches:
-        nd_raw = match.group(1)
-        nd_key = normalize_nd(nd_raw)
-        
-        start_idx = match.end()
-        chunk = content[start_idx:start_idx+2000]
-        
-        attrs = {}
-        skills = {}
-        
-        attr_match = re.search(r'attributes:\s*\{([^}]+)\}', chunk)
-        if attr_match:
-            vals = re.findall(r'(\w+):\s*(\d+)', attr_match.group(1))
-            for k, v in vals:
-                attrs[k] = int(v)
-        
-        skill_match = re.search(r'skills:\s*\{([^}]+)\}', chunk)
-        if skill_match:
-            vals = re.findall(r'(\w+):\s*(\d+)', skill_match.group(1))
-            for k, v in vals:
-                skills[k] = int(v)
-                
-        threats.append({
-            "file": os.path.basename(filepath),
-            "nd": nd_key,
-            "raw_nd": nd_raw,
-            "attributes": attrs,
-            "skills": skills
-        })
+    for _, _, value in iter_declarations(content):
+        for obj in iter_threat_objects(value):
+            nd_raw = obj.get("nd", obj.get("challengeLevel"))
+            nd_key = normalize_nd(nd_raw)
+            nd_field = "nd" if "nd" in obj else "challengeLevel"
+            skills = numeric_fields(obj, "skills")
+
+            threats.append({
+                "file": os.path.basename(filepath),
+                "name": obj.get("name", "?"),
+                "line": obj.line,
+                "nd_line": obj.key_lines.get(nd_field, obj.line),
+                "nd": nd_key,
+                "raw_nd": nd_raw,
+                "role": obj.get("role"),
+                "attributes": numeric_fields(obj, "attributes"),
+                "skills": skills,
+                "combat": combat_fields(obj, skills),
+            })
         
     return threats
 
-def main():
-    report = ["# Relatório de Inconsistências de Ameaças (THREAT_ERRORS)\n\n"]
+def validate_combat_stats(threats, tables, findings=None):
+    """
+    Compara todas as ameaças com as três COMBAT_TABLES de uma vez (NumPy).
+    Só a montagem dos arrays e a escrita dos desvios encontrados passam por Python.
+    Gera as linhas do relatório e registra cada desvio em `findings` (se informado).
+    """
+    yield "## Desvios em relação às COMBAT_TABLES\n"
+    if not threats:
+        return
+
+    n, m = len(threats), len(STAT_FIELDS)
+    field_idx = {f: j for j, f in enumerate(STAT_FIELDS)}
+    role_idx = np.fromiter(
+        (ROLES.index(role_key(t['role'])) if role_key(t['role']) else -1 for t in threats), int, n)
+    nd_idx = np.fromiter((tables.nd_index.get(t['nd'], -1) for t in threats), int, n)
+    observed = np.full((n, m), np.nan)
+    rows, cols, vals = [], [], []
+    for i, t in enumerate(threats):
+        for field, (val, _) in t['combat'].items():
+            rows.append(i)
+            cols.append(field_idx[field])
+            vals.append(val)
+    observed[rows, cols] = vals
+
+    expected, score = tables.deviations(role_idx, nd_idx, observed)
+    with np.errstate(invalid='ignore'):
+        outliers = np.abs(score) > 1
+
+    unknown = np.nonzero((role_idx < 0) | (nd_idx < 0))[0]
+    for i in unknown:
+        t = threats[i]
+        message = f"papel '{t['role']}' ou ND '{t['raw_nd']}' sem linha nas tabelas"
+        if findings:
+            findings.emit("info", "TABELA_SEM_LINHA", message, file=t['file'], line=t['line'], threat=t['name'])
+        yield f"- [TABELA] {t['file']}:{t['line']} {t['name']}: {message}\n"
+
+    for i in np.nonzero(outliers.any(axis=1))[0]:
+        t = threats[i]
+        role = ROLES[role_idx[i]]
+        yield f"### {t['file']}:{t['line']} {t['name']} (ND {t['raw_nd']}, {role})\n"
+        for j in np.nonzero(outliers[i])[0]:
+            field = STAT_FIELDS[j]
+            line = t['combat'][field][1]
+            message = (f"{field} = {observed[i, j]:g} "
+                       f"(esperado {expected[i, j]:g}, desvio {score[i, j]:+.1f} faixas)")
+            if findings:
+                # Mais de duas faixas de tolerância fora conta como erro
+                severity = "error" if abs(score[i, j]) > 2 else "warning"
+                findings.emit(severity, "TABELA", message, file=t['file'], line=int(line), threat=t['name'],
+                              nd=t['nd'], role=role, stat=field, value=float(observed[i, j]),
+                              expected=float(expected[i, j]), score=round(float(score[i, j]), 2))
+            yield f"- [TABELA] linha {line}: {message}\n"
+        yield "\n"
+
+    checked = int(np.count_nonzero(~np.isnan(score)))
+    yield f"{checked} estatísticas comparadas, {int(outliers.sum())} fora da tolerância.\n\n"
+
+def list_threat_files(threats_dir):
+    """Arquivos .ts de ameaças em ordem determinística (combatTables.ts fica de fora)"""
+    paths = []
+    for root, dirs, files in os.walk(threats_dir):
+        dirs.sort()
+        for fname in sorted(files):
+            if fname.endswith('.ts') and fname != 'combatTables.ts':
+                paths.append(os.path.join(root, fname))
+    return paths
+
+def parse_threat_files(paths, workers=1):
+    """
+    Interpreta os arquivos de ameaças e devolve {caminho: ameaças} na ordem de `paths`.
+    Com workers > 1 o parse roda em um pool de processos.
+    """
+    if workers > 1 and len(paths) > 1:
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(parse_ts_file, paths, chunksize=chunksize))
+    else:
+        results = [parse_ts_file(p) for p in paths]
+    return dict(zip(paths, results))
+
+def load_reference():
+    """
+    Carrega a tabela de referência (PDF ou código) e as COMBAT_TABLES.
+    Devolve (cabeçalho, problemas, tabelas); problemas são (severidade, código, mensagem)
+    gravados como achados em cada relatório.
+    """
+    header = ["# Relatório de Inconsistências de Ameaças (THREAT_ERRORS)\n\n"]
+    problems = []
     
     # 1. Get Table
-    stats_table = extract_table_from_pdf(PDF_PATH)
+    try:
+        stats_table = extract_table_from_pdf(PDF_PATH)
+    except TableLayoutError as e:
+        # PDF com layout inesperado: avisa e segue com as tabelas do código
+        print(f"AVISO: {e}")
+        header.append(f"WARN: {e}\n")
+        problems.append(("warning", "TABELA_LAYOUT", str(e)))
+        stats_table = {}
     if not stats_table:
-        report.append("WARN: Tabela PDF não encontrada. Tentando extrair de combatTables.ts...\n")
+        header.append("WARN: Tabela PDF não encontrada. Tentando extrair de combatTables.ts...\n")
         stats_table = extract_table_from_code()
     
     if stats_table:
-        report.append(f"## Tabela de Referência Carregada ({len(stats_table)} entradas)\n\n")
+        header.append(f"## Tabela de Referência Carregada ({len(stats_table)} entradas)\n\n")
     else:
-        report.append("## ERRO CRÍTICO: Não foi possível carregar tabela de estatísticas.\n\n")
+        header.append("## ERRO CRÍTICO: Não foi possível carregar tabela de estatísticas.\n\n")
+        problems.append(("error", "TABELA_REFERENCIA", "Não foi possível carregar tabela de estatísticas."))
 
-    # 2. Iterate Threat Files
-    all_threats = []
-    if os.path.exists(THREATS_DIR):
-        print(f"Scanning directory: {THREATS_DIR}")
-        for fname in os.listdir(THREATS_DIR):
-            if fname.endswith('.ts') and fname != 'combatTables.ts':
-                fpath = os.path.join(THREATS_DIR, fname)
-                threats = parse_ts_file(fpath)
-                all_threats.extend(threats)
+    return header, problems, load_combat_tables()
+
+def load_combat_tables():
+    tables_path = os.path.join(THREATS_DIR, 'combatTables.ts')
+    if os.path.exists(tables_path):
+        return CombatTables.load(tables_path)
+    return None
+
+def validate_simulation(threats, tables, trials, findings=None):
+    """Sinaliza ameaças cuja dificuldade simulada não corresponde à linha do seu papel e ND"""
+    yield f"## Dificuldade simulada ({trials} combates por ameaça)\n"
+    flagged = 0
+    for t, sim, ref in difficulty_mismatches(threats, tables, trials):
+        flagged += 1
+        message = (f"vitória do grupo {sim['win_rate']:.0%} (tabela {ref['win_rate']:.0%}), "
+                   f"PV perdido {sim['hp_loss']:.0%} (tabela {ref['hp_loss']:.0%})")
+        if findings:
+            findings.emit("warning", "SIMULACAO", message, file=t['file'], line=t['line'], threat=t['name'],
+                          nd=t['nd'], role=role_key(t['role']), win_rate=round(sim['win_rate'], 3),
+                          expected_win_rate=round(ref['win_rate'], 3), hp_loss=round(sim['hp_loss'], 3),
+                          expected_hp_loss=round(ref['hp_loss'], 3))
+        yield f"- [SIMULACAO] {t['file']}:{t['line']} {t['name']} (ND {t['raw_nd']}): {message}\n"
+    yield f"{flagged} ameaças com dificuldade simulada fora do ND.\n\n"
+
+def build_report(header, all_threats, tables, findings=None, sim_trials=0):
+    """Gera as linhas do THREAT_ERRORS.md (e os achados em NDJSON) sem acumular o relatório"""
+    yield from header
     
     if not all_threats:
-        report.append("Nenhuma ameaça encontrada nos arquivos .ts em src/data/threats/.\n")
+        yield "Nenhuma ameaça encontrada nos arquivos .ts em src/data/threats/.\n"
     
     # 3. Validation Logic
-    report.append("## Análise\n")
+    yield "## Análise\n"
     
     for t in all_threats:
         issues = []
         nd = t['nd']
         
-        try:
-           nd_float = float(nd)
-        except:
-           nd_float = 999 
-
-        is_low_mid = nd_float <= 10
+        nd_float = nd_value(nd)
+        is_low_mid = nd_float is not None and nd_float <= 10
         
-        for attr, val in t['attributes'].items():
+        for attr, (val, line) in t['attributes'].items():
             if is_low_mid and val > 40:
-                issues.append(f"Atributo '{attr}' anormalmente alto (+{val}) para ND {nd}")
+                issues.append((line, f"Atributo '{attr}' anormalmente alto (+{val}) para ND {nd}"))
         
-        for skill, val in t['skills'].items():
+        for skill, (val, line) in t['skills'].items():
             if is_low_mid and val > 60:
-                issues.append(f"Perícia '{skill}' anormalmente alta (+{val}) para ND {nd}")
+                issues.append((line, f"Perícia '{skill}' anormalmente alta (+{val}) para ND {nd}"))
 
         if issues:
-            report.append(f"### {t['file']} (ND {t['raw_nd']})\n")
-            for i in issues:
-                report.append(f"- [SANITY] {i}\n")
-            report.append("\n")
+            yield f"### {t['file']}:{t['line']} {t['name']} (ND {t['raw_nd']})\n"
+            for line, i in issues:
+                if findings:
+                    findings.emit("warning", "SANITY", i, file=t['file'], line=line, threat=t['name'], nd=nd)
+                yield f"- [SANITY] linha {line}: {i}\n"
+            yield "\n"
+
+    # 4. Validação estatística contra combatTables.ts
+    if tables is not None:
+        yield from validate_combat_stats(all_threats, tables, findings)
+        # 5. Simulação Monte Carlo (opcional, --simulate)
+        if sim_trials:
+            yield from validate_simulation(all_threats, tables, sim_trials, findings)
+
+def write_report(lines, findings_path=FINDINGS_PATH, problems=()):
+    """
+    Escreve o Markdown e o NDJSON em streaming e devolve o código de saída
+    (0 sem achados, 1 com avisos, 2 com erros).
+    """
+    with open(REPORT_PATH, 'w', encoding='utf-8') as f, FindingWriter(findings_path, "threat_validator") as findings:
+        for severity, code, message in problems:
+            findings.emit(severity, code, message)
+        for line in lines(findings):
+            f.write(line)
+        print(f"Achados: {findings.summary()} ({findings_path})")
+        return findings.exit_code()
+
+def file_stamps(paths):
+    stamps = {}
+    for p in paths:
+        try:
+            st = os.stat(p)
+        except FileNotFoundError:
+            continue
+        stamps[p] = (st.st_mtime_ns, st.st_size)
+    return stamps
+
+def watch(header, problems, tables, parsed, findings_path=FINDINGS_PATH, sim_trials=0, interval=0.25):
+    """
+    Mantém tabelas e ameaças em memória e verifica os arquivos por polling (funciona
+    igual no Windows e no Linux, sem dependências). A cada alteração só o arquivo
+    modificado é reinterpretado e o THREAT_ERRORS.md é reescrito.
+    """
+    tables_path = os.path.join(THREATS_DIR, 'combatTables.ts')
+    stamps = file_stamps([*parsed, tables_path])
+    print(f"Observando {THREATS_DIR} (Ctrl+C para sair)...")
+    try:
+        while True:
+            time.sleep(interval)
+            paths = list_threat_files(THREATS_DIR)
+            current = file_stamps([*paths, tables_path])
+            changed = [p for p in current if current[p] != stamps.get(p)]
+            removed = [p for p in stamps if p not in current]
+            if not changed and not removed:
+                continue
 
-    with open(REPORT_PATH, 'w', encoding='utf-8') as f:
-        f.write("".join(report))
+            started = time.perf_counter()
+            for p in removed:
+                parsed.pop(p, None)
+            for p in changed:
+                try:
+                    if p == tables_path:
+                        tables = load_combat_tables()
+                    else:
+                        parsed[p] = parse_ts_file(p)
+                except Exception as e:
+                    # Arquivo salvo pela metade: mantém a versão anterior até o próximo save
+                    print(f"[watch] Erro ao ler {os.path.basename(p)}: {e}")
+            stamps = current
+
+            all_threats = [t for p in paths for t in parsed.get(p, [])]
+            write_report(lambda findings: build_report(header, all_threats, tables, findings, sim_trials),
+                         findings_path, problems)
+            elapsed = (time.perf_counter() - started) * 1000
+            names = ", ".join(os.path.basename(p) for p in changed + removed)
+            print(f"[watch] {names} revalidado em {elapsed:.0f} ms")
+    except KeyboardInterrupt:
+        print("\nWatch encerrado.")
+
+def main(workers=1, watch_mode=False, findings_path=FINDINGS_PATH, sim_trials=0):
+    with stage("tables.load"):
+        header, problems, tables = load_reference()
+
+    # 2. Iterate Threat Files
+    parsed = {}
+    if os.path.exists(THREATS_DIR):
+        print(f"Scanning directory: {THREATS_DIR}")
+        with stage("threats.parse"):
+            parsed = parse_threat_files(list_threat_files(THREATS_DIR), workers)
+    all_threats = [t for threats in parsed.values() for t in threats]
+    count("threat_files", len(parsed))
+    count("threats", len(all_threats))
+
+    with stage("report.validate"):
+        exit_code = write_report(lambda findings: build_report(header, all_threats, tables, findings, sim_trials),
+                                 findings_path, problems)
     
     print(f"Relatório gerado em: {REPORT_PATH}")
 
+    if watch_mode:
+        watch(header, problems, tables, parsed, findings_path, sim_trials)
+    return exit_code
+
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Valida as ameaças contra as tabelas de ND")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processos para ler e interpretar os arquivos de ameaças")
+    parser.add_argument("--ndjson", default=FINDINGS_PATH,
+                        help="Arquivo NDJSON com um achado por linha")
+    parser.add_argument("--watch", action="store_true",
+                        help="Fica observando os arquivos e revalida a cada alteração")
+    parser.add_argument("--simulate", type=int, nargs="?", const=2000, default=0, metavar="COMBATES",
+                        help="Compara a dificuldade simulada (Monte Carlo) de cada ameaça com a do seu ND")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    start(args.profile)
+    sys.exit(main(workers=args.workers, watch_mode=args.watch, findings_path=args.ndjson,
+                  sim_trials=args.simulate))
@@ -0,0 +1,512 @@
+import re
+from bisect import bisect_right
+
+# Scanner leve de TypeScript, suficiente para os arquivos de dados do app.
+# A ideia é "mascarar" comentários e o conteúdo de strings (trocando por espaços,
+# mantendo o tamanho e as quebras de linha). Assim regex e contagem de chaves
+# podem rodar no texto mascarado e os offsets continuam valendo para o original.
+
+IDENT = r'[A-Za-z_$][\w$]*'
+OPENERS = {'{': '}', '[': ']', '(': ')'}
+BRACKET_RE = re.compile(r'[{}\[\]()]')
+
+
+# Trechos que o mascaramento precisa tratar; o resto do código é copiado como está.
+# Dentro de um ${...} de template literal também interessam as chaves, para achar o '}' que o fecha.
+MASK_RE = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | "(?P<dq>(?:\\.|[^"\\\n])*)"?
+  | '(?P<sq>(?:\\.|[^'\\\n])*)'?
+  | (?P<template>`)
+""", re.VERBOSE | re.DOTALL)
+MASK_IN_TEMPLATE_RE = re.compile(MASK_RE.pattern + r"""
+  | (?P<open>\{)
+  | (?P<close>\})
+""", re.VERBOSE | re.DOTALL)
+# Corpo de um template literal até a crase de fechamento ou o próximo ${
+TEMPLATE_BODY_RE = re.compile(r"(?:\\.|[^`\\$]|\$(?!\{))*", re.DOTALL)
+NOT_NEWLINE_RE = re.compile(r"[^\n]")
+
+
+def _blank(text):
+    """Troca por espaços tudo que não for quebra de linha"""
+    return NOT_NEWLINE_RE.sub(' ', text) if '\n' in text else ' ' * len(text)
+
+
+def mask_source(source):
+    """Retorna o código com comentários e conteúdo de strings trocados por espaços"""
+    n = len(source)
+    parts = []
+    copied = 0  # source[:copied] já está em parts
+    i = 0
+    # Pilha de profundidade de chaves dentro de cada ${...} de template literal aberto
+    template_stack = []
+
+    def blank_span(start, end):
+        nonlocal copied
+        parts.append(source[copied:start])
+        parts.append(_blank(source[start:end]))
+        copied = end
+
+    def scan_template(i):
+        # i aponta logo após a crase (ou após o '}' que fecha um ${...})
+        end = TEMPLATE_BODY_RE.match(source, i).end()
+        blank_span(i, end)
+        if source.startswith('`', end):
+            return end + 1
+        if source.startswith('${', end):
+            template_stack.append(0)
+            return end + 2
+        # Template sem fechamento (ou barra invertida no fim do arquivo)
+        blank_span(end, n)
+        return n
+
+    while i < n:
+        match = (MASK_IN_TEMPLATE_RE if template_stack else MASK_RE).search(source, i)
+        if not match:
+            break
+        kind = match.lastgroup
+        i = match.end()
+        if kind == "comment":
+            blank_span(match.start(), i)
+        elif kind in ("dq", "sq"):
+            blank_span(match.start(kind), match.end(kind))
+        elif kind == "template":
+            i = scan_template(i)
+        elif kind == "open":
+            template_stack[-1] += 1
+        elif template_stack[-1] == 0:
+            template_stack.pop()
+            i = scan_template(i)
+        else:
+            template_stack[-1] -= 1
+    parts.append(source[copied:])
+    return "".join(parts)
+
+
+def find_closing(masked, open_idx):
+    """Índice do fechamento correspondente ao '{', '[' ou '(' em open_idx (no texto mascarado)"""
+    stack = []
+    for match in BRACKET_RE.finditer(masked, open_idx):
+        c = match.group()
+        if c in OPENERS:
+            stack.append(OPENERS[c])
+        elif not stack or stack.pop() != c:
+            return -1
+        elif not stack:
+            return match.start()
+    return -1
+
+
+def line_of(source, idx):
+    return source.count('\n', 0, idx) + 1
+
+
+def _literal_after(source, masked, match):
+    """Recorta o literal ({...} ou [...]) que começa logo após o match"""
+    open_idx = match.end() - 1
+    close_idx = find_closing(masked, open_idx)
+    if close_idx == -1:
+        return None
+    return source[open_idx:close_idx + 1]
+
+
+def extract_const_object(source, name, masked=None):
+    """Literal atribuído a `const NAME = {...}` (ou [...]), ignorando comentários e strings"""
+    masked = masked or mask_source(source)
+    match = re.search(rf'\b(?:const|let|var)\s+{re.escape(name)}\b[^=;]*=\s*[{{\[]', masked)
+    return _literal_after(source, masked, match) if match else None
+
+
+def default_export_name(source, masked=None):
+    masked = masked or mask_source(source)
+    match = re.search(rf'\bexport\s+default\s+({IDENT})\s*;?', masked)
+    return match.group(1) if match else None
+
+
+def extract_default_object(source):
+    """Literal do objeto exportado por `export default NOME`"""
+    masked = mask_source(source)
+    name = default_export_name(source, masked)
+    return extract_const_object(source, name, masked) if name else None
+
+
+def iter_record_entries(source, masked=None):
+    """
+    Gera (chave, literal) para cada entrada `[Enum.chave]: {...}` do arquivo em uma única
+    passada, sem reprocessar o arquivo a cada chave procurada.
+    """
+    masked = masked or mask_source(source)
+    pos = 0
+    pattern = re.compile(rf'\[\s*(?:{IDENT}\.)+({IDENT})\s*\]\s*:\s*\{{')
+    while True:
+        match = pattern.search(masked, pos)
+        if not match:
+            return
+        close_idx = find_closing(masked, match.end() - 1)
+        if close_idx == -1:
+            return
+        yield match.group(1), source[match.end() - 1:close_idx + 1]
+        pos = close_idx + 1
+
+
+# Chaves de objeto (logo após '{' ou ',') e os delimitadores que mudam o nível
+PROPERTY_RE = re.compile(rf'(?P<open>[{{\[(])|(?P<close>[}}\])])|(?<=[{{,])(?P<key>\s*(?P<name>{IDENT})\s*:)')
+VALUE_STOP_RE = re.compile(r'[{}\[\]()]|,')
+
+
+def _value_end(masked, pos):
+    """Índice da vírgula (ou do fechamento) que encerra o valor que começa em pos"""
+    depth = 0
+    for match in VALUE_STOP_RE.finditer(masked, pos):
+        c = match.group()
+        if c in OPENERS:
+            depth += 1
+        elif depth == 0:
+            return match.start()
+        elif c != ',':
+            depth -= 1
+    return len(masked)
+
+
+def drop_properties(literal, top_level=(), anywhere=()):
+    """
+    Remove propriedades `chave: valor` de um literal de objeto: as de `top_level` só no
+    próprio objeto, as de `anywhere` em qualquer nível. O resto do texto fica como está.
+    """
+    masked = mask_source(literal)
+    parts = []
+    copied = 0
+    depth = 0
+    pos = 0
+    while True:
+        match = PROPERTY_RE.search(masked, pos)
+        if not match:
+            break
+        pos = match.end()
+        kind = match.lastgroup
+        if kind == "open":
+            depth += 1
+        elif kind == "close":
+            depth -= 1
+        elif match.group("name") in anywhere or (depth == 1 and match.group("name") in top_level):
+            start = match.start("name")
+            # Propriedade no começo da linha: sai junto com a quebra de linha e a indentação
+            line_start = masked.rfind('\n', copied, start)
+            if line_start != -1 and not masked[line_start:start].strip():
+                start = line_start
+            end = _value_end(masked, pos)
+            if masked.startswith(',', end):
+                end += 1
+            else:
+                # Última propriedade: o espaço antes do fechamento fica
+                end = len(masked[:end].rstrip())
+            parts.append(literal[copied:start])
+            copied = pos = end
+    parts.append(literal[copied:])
+    return "".join(parts)
+
+
+# ---------------------------------------------------------------------------
+# Tokenizer + parser de literais (objetos, arrays, strings, números e
+# referências como ChallengeLevel.HALF), usado para ler os dados de ameaças.
+# Expressões que não são literais (funções, chamadas) viram o texto bruto.
+
+# Um único padrão para todos os tokens; o espaço em branco antes de cada token é
+# consumido pelo próprio match, e qualquer caractere desconhecido vira pontuação isolada
+TOKEN_RE = re.compile(r"""
+    \s*(?:
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+  | (?P<template>`)
+  | (?P<number>(?:0[xX][0-9a-fA-F_]+|(?:\d[\d_]*\.?\d*|\.\d+)(?:[eE][+-]?\d+)?))
+  | (?P<ident>[A-Za-z_$][\w$]*)
+  | (?P<arrow>=>)
+  | (?P<spread>\.\.\.)
+  | (?P<punct>[{}\[\](),:;=.?<>+\-*/%!&|^~@#]|\S)
+    )
+""", re.VERBOSE | re.DOTALL)
+# Corpo de template literal até a crase, um ${ ou um } (para acompanhar a profundidade)
+TEMPLATE_SKIP_RE = re.compile(r"(?:\\.|[^`\\${}]|\$(?!\{))*", re.DOTALL)
+# Campos de um token. Tuplas simples: um arquivo de ameaças grande tem milhões de tokens
+KIND, VALUE, POS = 0, 1, 2
+# Tokens que encerram um valor dentro de objeto/array/declaração
+VALUE_END = frozenset((',', '}', ']', ')', ';'))
+
+
+class TsObject(dict):
+    """dict com a linha onde o objeto começa e a linha de cada chave"""
+
+    def __init__(self, line):
+        super().__init__()
+        self.line = line
+        self.key_lines = {}
+
+
+def _skip_template(source, i):
+    """i aponta logo após a crase; retorna o índice após a crase de fechamento"""
+    depth = 0
+    n = len(source)
+    while True:
+        i = TEMPLATE_SKIP_RE.match(source, i).end()
+        if i >= n:
+            return n
+        c = source[i]
+        if c == '`' and depth == 0:
+            return i + 1
+        if source.startswith('${', i):
+            depth += 1
+            i += 2
+            continue
+        if c == '}' and depth:
+            depth -= 1
+        # Barra invertida no fim do arquivo, ou '{', '}' e crase que não mudam o nível
+        i += 1
+
+
+def tokenize(source):
+    """
+    Tokeniza o código em uma única passada (comentários e espaços são descartados).
+    Cada token é uma tupla (tipo, valor, posição no código); ver KIND, VALUE e POS.
+    """
+    tokens = []
+    append = tokens.append
+    pos = 0
+    while True:
+        # finditer só é reiniciado depois de um template literal, que o padrão não cobre
+        for match in TOKEN_RE.finditer(source, pos):
+            kind = match.lastgroup
+            if kind == "comment":
+                continue
+            start = match.start(kind)
+            if kind == "template":
+                pos = _skip_template(source, start + 1)
+                append(("string", source[start + 1:pos - 1], start))
+                break
+            if kind == "string":
+                append(("string", _unquote(match.group(kind)), start))
+            else:
+                append((kind, match.group(kind), start))
+        else:
+            return tokens
+
+
+def _unquote(literal):
+    body = literal[1:-1]
+    if '\\' not in body:
+        return body
+    return re.sub(r'\\(.)', lambda m: {'n': '\n', 't': '\t'}.get(m.group(1), m.group(1)), body)
+
+
+class LiteralParser:
+    def __init__(self, source, tokens=None):
+        self.source = source
+        self.tokens = tokens if tokens is not None else tokenize(source)
+        self.i = 0
+        self._newlines = None
+
+    def line_of(self, tok):
+        """Linha (1-based) de um token; os offsets das quebras de linha são calculados uma vez"""
+        if self._newlines is None:
+            self._newlines = [m.start() for m in re.finditer('\n', self.source)]
+        return bisect_right(self._newlines, tok[POS]) + 1
+
+    def peek(self, offset=0):
+        idx = self.i + offset
+        return self.tokens[idx] if idx < len(self.tokens) else None
+
+    def next(self):
+        tok = self.peek()
+        self.i += 1
+        return tok
+
+    def parse_value(self):
+        tok = self.peek()
+        if tok is None:
+            return None
+        kind, value = tok[KIND], tok[VALUE]
+        if value == '{' and kind == "punct":
+            return self.parse_object()
+        if value == '[' and kind == "punct":
+            return self.parse_array()
+        if kind == "string" and self._at_value_end(1):
+            self.i += 1
+            return value
+        if kind == "number" and self._at_value_end(1):
+            self.i += 1
+            return _to_number(value)
+        if value == '-':
+            nxt = self.peek(1)
+            if nxt is not None and nxt[KIND] == "number" and self._at_value_end(2):
+                self.i += 2
+                return -_to_number(nxt[VALUE])
+        if kind == "ident":
+            ref = self._member_chain()
+            if ref is not None:
+                return {"true": True, "false": False, "null": None, "undefined": None}.get(ref, ref)
+        return self.skip_expression()
+
+    def _at_value_end(self, offset):
+        tok = self.peek(offset)
+        return tok is None or tok[VALUE] in VALUE_END
+
+    def _member_chain(self):
+        """Lê A.B.C se for um valor completo; senão não consome nada e devolve None"""
+        tokens = self.tokens
+        start = i = self.i
+        parts = [tokens[i][VALUE]]
+        i += 1
+        while i + 1 < len(tokens) and tokens[i][VALUE] == '.' and tokens[i + 1][KIND] == "ident":
+            parts.append(tokens[i + 1][VALUE])
+            i += 2
+        if i >= len(tokens) or tokens[i][VALUE] in VALUE_END:
+            self.i = i
+            return ".".join(parts)
+        self.i = start
+        return None
+
+    def skip_expression(self):
+        """Consome uma expressão arbitrária até a vírgula/fechamento do nível atual e devolve o texto bruto"""
+        tokens = self.tokens
+        start_tok = self.peek()
+        depth = 0
+        last = start_tok
+        i = self.i
+        while i < len(tokens):
+            tok = tokens[i]
+            if tok[KIND] == "punct":
+                value = tok[VALUE]
+                if value in '{[(':
+                    depth += 1
+                elif value in '}])':
+                    if depth == 0:
+                        break
+                    depth -= 1
+                elif value in ',;' and depth == 0:
+                    break
+            last = tok
+            i += 1
+        self.i = i
+        if start_tok is None:
+            return ""
+        end = last[POS] + len(last[VALUE]) if last[KIND] != "string" else self._string_end(last)
+        return self.source[start_tok[POS]:end]
+
+    def _string_end(self, tok):
+        # Tokens de string guardam o valor sem aspas; localiza o fim no código original
+        quote = self.source[tok[POS]]
+        if quote == '`':
+            return _skip_template(self.source, tok[POS] + 1)
+        match = TOKEN_RE.match(self.source, tok[POS])
+        return match.end()
+
+    def parse_object(self):
+        tokens = self.tokens
+        open_tok = self.next()
+        obj = TsObject(self.line_of(open_tok))
+        while self.i < len(tokens) and tokens[self.i][VALUE] != '}':
+            tok = tokens[self.i]
+            if tok[KIND] == "spread":
+                self.i += 1
+                self.skip_expression()
+            else:
+                key = self._parse_key()
+                nxt = self.peek()
+                if nxt is not None and nxt[VALUE] == ':':
+                    self.i += 1
+                    obj[key] = self.parse_value()
+                elif nxt is not None and nxt[VALUE] == '(':
+                    # Método (ex: getDisplacement() { ... })
+                    obj[key] = self.skip_expression()
+                else:
+                    # Propriedade abreviada ({ nome })
+                    obj[key] = key
+                obj.key_lines[key] = self.line_of(tok)
+            nxt = self.peek()
+            if nxt is not None and nxt[VALUE] == ',':
+                self.i += 1
+            elif nxt is not None and nxt[VALUE] != '}':
+                self.skip_expression()
+        self.i += 1
+        return obj
+
+    def _parse_key(self):
+        tok = self.next()
+        if tok[VALUE] == '[':
+            start = self.i
+            depth = 1
+            while self.peek() is not None:
+                t = self.next()
+                if t[VALUE] == '[':
+                    depth += 1
+                elif t[VALUE] == ']':
+                    depth -= 1
+                    if depth == 0:
+                        break
+            inner = self.tokens[start:self.i - 1]
+            return "".join(t[VALUE] for t in inner)
+        if tok[KIND] == "number":
+            return _to_number(tok[VALUE])
+        return tok[VALUE]
+
+    def parse_array(self):
+        tokens = self.tokens
+        self.i += 1
+        items = []
+        while self.i < len(tokens) and tokens[self.i][VALUE] != ']':
+            if tokens[self.i][KIND] == "spread":
+                self.i += 1
+                self.skip_expression()
+            else:
+                items.append(self.parse_value())
+            nxt = self.peek()
+            if nxt is not None and nxt[VALUE] == ',':
+                self.i += 1
+            elif nxt is not None and nxt[VALUE] != ']':
+                self.skip_expression()
+        self.i += 1
+        return items
+
+
+def _to_number(text):
+    text = text.replace('_', '')
+    if text.lower().startswith('0x'):
+        return int(text, 16)
+    value = float(text)
+    return int(value) if value.is_integer() and '.' not in text and 'e' not in text.lower() else value
+
+
+def iter_declarations(source):
+    """
+    Gera (nome, linha, valor) para cada `const/let/var NOME (: Tipo)? = valor` de nível superior,
+    com o valor já convertido pelo LiteralParser.
+    """
+    parser = LiteralParser(source)
+    tokens = parser.tokens
+    depth = 0
+    while parser.i < len(tokens):
+        kind, value, _ = tokens[parser.i]
+        if kind == "punct" and value in '{[(':
+            depth += 1
+        elif kind == "punct" and value in '}])':
+            depth -= 1
+        elif (depth == 0 and kind == "ident" and value in ("const", "let", "var")
+              and parser.peek(1) is not None and parser.peek(1)[KIND] == "ident"):
+            name_tok = tokens[parser.i + 1]
+            parser.i += 2
+            # Pula a anotação de tipo até o '=' do mesmo nível
+            type_depth = 0
+            while parser.peek() is not None:
+                value = parser.peek()[VALUE]
+                if value in '{[(<':
+                    type_depth += 1
+                elif value in '}])>':
+                    type_depth -= 1
+                elif value in ('=', ';') and type_depth <= 0:
+                    break
+                parser.i += 1
+            if parser.peek() is not None and parser.peek()[VALUE] == '=':
+                parser.i += 1
+                yield name_tok[VALUE], parser.line_of(name_tok), parser.parse_value()
+            continue
+        parser.i += 1